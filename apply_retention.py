@@ -0,0 +1,48 @@
+import argparse
+import glob
+import os
+from core.retention import RetentionManager, RetentionPolicy
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune, archive and vacuum the knowledge and memory_entries tables.")
+    parser.add_argument("databases", nargs="*", help="SQLite files to process (default: every data/*.db).")
+    parser.add_argument("--max-age-days", type=float, help="Prune rows older than this.")
+    parser.add_argument("--max-rows", type=int, help="Keep only the newest rows of each table.")
+    parser.add_argument("--keep-all-versions", action="store_true",
+                        help="Keep superseded rows instead of only the latest row per key.")
+    parser.add_argument("--no-archive", action="store_true", help="Delete pruned rows without archiving them.")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="Convert older files to auto_vacuum=INCREMENTAL (runs a full VACUUM; use while idle).")
+    parser.add_argument("--import-segment", nargs="+", metavar="SEGMENT",
+                        help="Re-import archived segments into the given database instead of pruning.")
+    args = parser.parse_args()
+
+    data_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    databases = args.databases or sorted(glob.glob(os.path.join(data_directory, "*.db")))
+
+    if args.import_segment:
+        if len(databases) != 1:
+            raise SystemExit("Error: Give exactly one database to import segments into.")
+        with RetentionManager(databases[0]) as manager:
+            for path in args.import_segment:
+                print(f"Imported {manager.import_segment(path)} rows from {path}.")
+        raise SystemExit(0)
+
+    policy = RetentionPolicy(
+        max_age_days=args.max_age_days,
+        max_rows=args.max_rows,
+        keep_latest_per_key=not args.keep_all_versions,
+    )
+    for db_path in databases:
+        with RetentionManager(db_path) as manager:
+            if args.enable_incremental_vacuum:
+                manager.enable_incremental_vacuum()
+            for table in ("knowledge", "memory_entries"):
+                pruned, segments = manager.prune(table, policy, archive=not args.no_archive)
+                if pruned:
+                    print(f"{os.path.basename(db_path)}: pruned {pruned} {table} rows, archived to {len(segments)} segment(s).")
+            released = manager.incremental_vacuum()
+            if released is None:
+                print(f"{os.path.basename(db_path)}: incremental vacuum is not enabled (see --enable-incremental-vacuum).")
+            elif released:
+                print(f"{os.path.basename(db_path)}: released {released} free pages.")
\ No newline at end of file
@@ -0,0 +1,46 @@
+import hashlib
+import time
+import numpy as np
+from scipy.sparse import random as sparse_random
+from scipy.sparse.linalg import norm
+from core.holographic_memory import DENSITY
+from core.sparse_encoder import SparseEncoder
+
+# Dimensionalities compared by the benchmark
+BENCHMARK_DIMENSIONS = (1024, 4096, 16384, 65536)
+
+# Digests encoded per dimensionality
+BENCHMARK_ENCODES = 500
+
+def scipy_encode(digest, dimensions):
+    """
+    The original encoder: a 1 x dimensions scipy sparse matrix, normalized and densified.
+    """
+    rng = np.random.RandomState(int.from_bytes(digest, "big") % (2**32))
+    hd_vector = sparse_random(1, dimensions, density=DENSITY, format='csr', random_state=rng)
+    hd_vector = hd_vector / norm(hd_vector)
+    return hd_vector.toarray().flatten()
+
+def time_per_encode(encode, digests):
+    start = time.perf_counter()
+    for digest in digests:
+        encode(digest)
+    return (time.perf_counter() - start) / len(digests) * 1e6
+
+def run_benchmark(dimensions_list=BENCHMARK_DIMENSIONS, encodes=BENCHMARK_ENCODES):
+    """
+    Prints the per-encode cost in microseconds of the original scipy path
+    and both SparseEncoder modes at each dimensionality.
+    """
+    digests = [hashlib.sha256(str(i).encode()).digest() for i in range(encodes)]
+    print(f"{'dimensions':>10} {'scipy (us)':>12} {'compat (us)':>12} {'fast (us)':>12} {'speedup':>8}")
+    for dimensions in dimensions_list:
+        compat = SparseEncoder(dimensions, DENSITY, "compat")
+        fast = SparseEncoder(dimensions, DENSITY, "fast")
+        scipy_us = time_per_encode(lambda digest: scipy_encode(digest, dimensions), digests)
+        compat_us = time_per_encode(compat.encode, digests)
+        fast_us = time_per_encode(fast.encode, digests)
+        print(f"{dimensions:>10} {scipy_us:>12.1f} {compat_us:>12.1f} {fast_us:>12.1f} {scipy_us / fast_us:>7.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
\ No newline at end of file
@@ -1,23 +1,120 @@
+import asyncio
+import hashlib
+import queue
 import sqlite3
+import zlib
 import os
+import sys
+import threading
+
+def get_root_dir():
+    """
+    Gets the absolute path to the root directory of the project.
+
+    Returns:
+        str: The absolute path to the root directory.
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_root_to_path():
+    """
+    Adds the root directory to the Python path.
+    """
+    root_dir = get_root_dir()
+    sys.path.insert(0, root_dir)
+
+add_root_to_path()
+
+from core.retention import archive_merged_rows, default_archive_dir
+from core.write_behind import WriteBehindWriter
+
+# Applied to every pooled connection. WAL lets readers run alongside the
+# writer, NORMAL only fsyncs at checkpoints, and the busy timeout makes
+# writers from several threads wait for the lock instead of failing.
+# auto_vacuum only takes effect on new files; it lets retention runs hand
+# pruned pages back with incremental_vacuum.
+CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Statement used for every row written to the knowledge table. A task is
+# stored once per domain: repeating it updates the output, bumps seen_count
+# and refreshes last_seen instead of adding a row.
+INSERT_KNOWLEDGE_SQL = """
+INSERT INTO knowledge (input_data, output_data, content_hash, domain, last_seen)
+VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+ON CONFLICT (IFNULL(domain, ''), content_hash) DO UPDATE SET
+    output_data = excluded.output_data,
+    seen_count = seen_count + 1,
+    last_seen = excluded.last_seen
+"""
+
+# Rows hashed per transaction when backfilling content_hash on older tables
+BACKFILL_BATCH_SIZE = 1024
+
+def content_hash(input_data):
+    """
+    Returns the hex SHA-256 of a task's stored input_data text.
+    """
+    return hashlib.sha256(str(input_data).encode("utf-8")).hexdigest()
 
 class DBManager:
-    def __init__(self, db_name):
+    def __init__(self, db_name, batch_rows=None, flush_interval_ms=50):
         self.db_name = db_name
-        
+        self.rows_inserted = 0
+
         # Navigate up to the main directory and then into the 'data' directory
         self.db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", db_name)
-        
+
         # Ensure the data directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
+
+        # Each thread reuses one long-lived connection; all of them are
+        # tracked so close() can release them together
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
         self.create_table()
 
+        # With batch_rows set, inserts are queued and committed every
+        # batch_rows rows or flush_interval_ms, whichever comes first
+        self._writer = None
+        if batch_rows:
+            self._writer = WriteBehindWriter(
+                self.db_path,
+                INSERT_KNOWLEDGE_SQL,
+                flush_rows=batch_rows,
+                flush_interval_ms=flush_interval_ms,
+            )
+
     def connect(self):
-        return sqlite3.connect(self.db_path)
+        """
+        Opens a new connection with the pooled PRAGMAs applied. The caller owns it.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def get_connection(self):
+        """
+        Returns the calling thread's pooled connection, opening it on first use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
 
     def create_table(self):
-        conn = self.connect()
+        conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS knowledge (
@@ -27,19 +124,332 @@ class DBManager:
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         """)
+
+        # Tables created before content_hash existed get the column and a
+        # backfill. domain is only set in consolidated stores (see KnowledgeStore)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(knowledge)")}
+        if "content_hash" not in columns:
+            cursor.execute("ALTER TABLE knowledge ADD COLUMN content_hash TEXT")
+        if "domain" not in columns:
+            cursor.execute("ALTER TABLE knowledge ADD COLUMN domain TEXT")
+        if "seen_count" not in columns:
+            cursor.execute("ALTER TABLE knowledge ADD COLUMN seen_count INTEGER DEFAULT 1")
+        if "last_seen" not in columns:
+            cursor.execute("ALTER TABLE knowledge ADD COLUMN last_seen DATETIME")
+        while True:
+            rows = cursor.execute(
+                "SELECT id, input_data FROM knowledge WHERE content_hash IS NULL LIMIT ?",
+                (BACKFILL_BATCH_SIZE,),
+            ).fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                "UPDATE knowledge SET content_hash = ? WHERE id = ?",
+                [(content_hash(input_data), row_id) for row_id, input_data in rows],
+            )
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_knowledge_entry'")
+        if cursor.fetchone() is None:
+            self._merge_duplicates(cursor)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_domain ON knowledge (domain, id)")
         conn.commit()
-        conn.close()
+
+    def _merge_duplicates(self, cursor):
+        # Tables written before upserts hold one row per task run; keep the
+        # latest row of each task, carrying the run count over, then enforce
+        # one row per (domain, content_hash). The older rows are archived
+        # rather than dropped, so they can be restored with RetentionManager
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_content_hash ON knowledge (content_hash)")
+        cursor.execute("""
+        UPDATE knowledge SET
+            seen_count = (
+                SELECT COUNT(*) FROM knowledge AS other
+                WHERE other.content_hash = knowledge.content_hash
+                    AND IFNULL(other.domain, '') = IFNULL(knowledge.domain, '')
+            ),
+            last_seen = timestamp
+        WHERE id IN (SELECT MAX(id) FROM knowledge GROUP BY IFNULL(domain, ''), content_hash)
+        """)
+        ids = [row[0] for row in cursor.execute("""
+        SELECT id FROM knowledge
+        WHERE id NOT IN (SELECT MAX(id) FROM knowledge GROUP BY IFNULL(domain, ''), content_hash)
+        """).fetchall()]
+        if archive_merged_rows(cursor, self.db_path, "knowledge", ids):
+            print(f"Merged {len(ids)} duplicate rows in {self.db_name}; archived them in {default_archive_dir(self.db_path)}.")
+        cursor.execute("CREATE UNIQUE INDEX idx_knowledge_entry ON knowledge (IFNULL(domain, ''), content_hash)")
+        cursor.execute("DROP INDEX idx_knowledge_content_hash")
+
+    def lookup_output(self, input_data, domain=None):
+        """
+        Returns the most recently stored output_data for input_data, or None.
+        Rows still queued by a batching manager are not visible yet.
+        """
+        input_data = str(input_data)
+        row = self.get_connection().execute(
+            """
+            SELECT output_data FROM knowledge
+            WHERE IFNULL(domain, '') = ? AND content_hash = ? AND input_data = ?
+            """,
+            (domain or "", content_hash(input_data), input_data),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def insert_data(self, input_data, output_data, domain=None):
+        self._insert([(input_data, output_data)], domain)
+
+    def insert_many(self, rows, domain=None):
+        """
+        Inserts (input_data, output_data) rows in a single transaction.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        self._insert(rows, domain)
+
+    def _insert(self, rows, domain=None):
+        rows = [(input_data, output_data, content_hash(input_data), domain) for input_data, output_data in rows]
+        if self._writer is not None:
+            self._writer.submit(rows)
+        else:
+            conn = self.get_connection()
+            with conn:
+                conn.executemany(INSERT_KNOWLEDGE_SQL, rows)
+        self.rows_inserted += len(rows)
+
+    def flush(self):
+        """
+        Commits rows still queued by a batching manager.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """
+        Commits queued rows, prints how many rows were inserted and closes every
+        pooled connection. Threads that use the manager afterwards open a fresh
+        connection.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.rows_inserted:
+            print(f"{self.rows_inserted} rows inserted into {self.db_name}.")
+            self.rows_inserted = 0
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class DomainDB:
+    """
+    A DBManager-compatible view of one domain in a consolidated store. It
+    shares the store's connections and batch writer and tags its rows with
+    the domain.
+    """
+    def __init__(self, db_manager, domain):
+        self.db_manager = db_manager
+        self.domain = domain
+        self.db_name = f"{db_manager.db_name}:{domain}"
 
     def insert_data(self, input_data, output_data):
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO knowledge (input_data, output_data) VALUES (?, ?)", (input_data, output_data))
-        conn.commit()
-        conn.close()
-        print(f"Data inserted into {self.db_name}: Input={input_data}, Output={output_data}")
+        self.db_manager.insert_data(input_data, output_data, self.domain)
+
+    def insert_many(self, rows):
+        self.db_manager.insert_many(rows, self.domain)
+
+    def lookup_output(self, input_data):
+        return self.db_manager.lookup_output(input_data, self.domain)
+
+    def flush(self):
+        self.db_manager.flush()
+
+    def close(self):
+        # The store owns the connections; a view only commits its queued rows
+        self.db_manager.flush()
+
+class KnowledgeStore:
+    """
+    Consolidated knowledge storage: one SQLite file, or a fixed number of
+    shard files, holding every domain in a knowledge table with a domain
+    column. Each domain always maps to the same shard. Use for_domain() where
+    a per-domain DBManager was used before.
+    """
+    def __init__(self, shards=1, base_name="knowledge", batch_rows=None, flush_interval_ms=50):
+        if shards < 1:
+            raise ValueError("A knowledge store needs at least one shard.")
+        names = [f"{base_name}.db"] if shards == 1 else [f"{base_name}_{i}.db" for i in range(shards)]
+        self.shards = [DBManager(name, batch_rows, flush_interval_ms) for name in names]
+
+    def shard_for(self, domain):
+        # crc32 is stable across processes, unlike hash()
+        return self.shards[zlib.crc32(domain.encode("utf-8")) % len(self.shards)]
+
+    def for_domain(self, domain):
+        return DomainDB(self.shard_for(domain), domain)
+
+    def count_by_domain(self):
+        """
+        Returns the number of stored rows per domain across all shards.
+        """
+        counts = {}
+        for shard in self.shards:
+            shard.flush()
+            for domain, count in shard.get_connection().execute(
+                "SELECT domain, COUNT(*) FROM knowledge GROUP BY domain"
+            ):
+                counts[domain] = counts.get(domain, 0) + count
+        return counts
+
+    def flush(self):
+        for shard in self.shards:
+            shard.flush()
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# Item queued to the writer thread to stop it
+_STOP = object()
+
+class AsyncDBManager:
+    """
+    An asyncio front end for DBManager with the same knowledge schema. Rows
+    are handed to a dedicated writer thread, which commits whatever has queued
+    up in one transaction, so coroutines never wait on SQLite. insert() and
+    insert_many() return once the rows are queued; when max_pending batches
+    are already waiting they wait for the writer to catch up. flush() waits
+    until everything queued before it is committed.
+    """
+    def __init__(self, db_name, max_pending=1024, batch_rows=256):
+        self.db = DBManager(db_name)
+        self.db_name = db_name
+        self.max_pending = max_pending
+        self.batch_rows = batch_rows
+        self._queue = queue.SimpleQueue()
+        self._slots = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    async def insert(self, input_data, output_data):
+        await self.insert_many([(input_data, output_data)])
+
+    async def insert_many(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        self._raise_error()
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        # Backpressure: each queued batch holds a slot until it is committed
+        await self._slots.acquire()
+        self._queue.put((loop, self._slots, rows))
+
+    async def flush(self):
+        """
+        Waits until every row queued so far is committed.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._queue.put((loop, done, None))
+        await done
+        self._raise_error()
+
+    async def close(self):
+        """
+        Commits queued rows, stops the writer thread and closes the connections.
+        """
+        if not self._thread.is_alive():
+            return
+        await self.flush()
+        self._queue.put(_STOP)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        self.db.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            # Take everything else already queued, up to batch_rows rows
+            items = [item]
+            row_count = len(item[2] or ())
+            while row_count < self.batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                items.append(item)
+                row_count += len(item[2] or ())
+            self._write(items)
+
+    def _write(self, items):
+        rows = [row for _, _, batch in items if batch for row in batch]
+        try:
+            if rows:
+                self.db.insert_many(rows)
+        except sqlite3.Error as e:
+            self._error = e
+        for loop, waiter, batch in items:
+            if batch is None:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            else:
+                loop.call_soon_threadsafe(waiter.release)
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
 
 # Self-execute section for testing
 if __name__ == "__main__":
     # Test the DBManager
-    db_manager = DBManager("test.db")
-    db_manager.insert_data("Test input", "Test output")
\ No newline at end of file
+    with DBManager("test.db") as db_manager:
+        db_manager.insert_data("Test input", "Test output")
+        db_manager.insert_many([(f"Test input {i}", f"Test output {i}") for i in range(1000)])
+
+    # Test the batching manager
+    with DBManager("test.db", batch_rows=100) as db_manager:
+        for i in range(1000):
+            db_manager.insert_data(f"Batched input {i}", f"Batched output {i}")
+
+    # Test the asyncio manager
+    async def test_async():
+        async with AsyncDBManager("test.db", max_pending=16) as async_db:
+            for i in range(1000):
+                await async_db.insert(f"Async input {i}", f"Async output {i}")
+            await async_db.flush()
+
+    asyncio.run(test_async())
+
+    # Test a consolidated store with two shards
+    with KnowledgeStore(shards=2, base_name="test_knowledge") as store:
+        for domain in ("math", "english", "python", "science"):
+            store.for_domain(domain).insert_many([(f"{domain} input {i}", f"{domain} output {i}") for i in range(10)])
+        print("Rows per domain:", store.count_by_domain())
\ No newline at end of file
@@ -1,20 +1,60 @@
+import itertools
 import json  # Import json for converting dictionaries to strings
+import os
+import sys
+import time
+import weakref
+
+def get_root_dir():
+    """
+    Gets the absolute path to the root directory of the project.
+
+    Returns:
+        str: The absolute path to the root directory.
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_root_to_path():
+    """
+    Adds the root directory to the Python path.
+    """
+    root_dir = get_root_dir()
+    sys.path.insert(0, root_dir)
+
+add_root_to_path()
 
 class EmergentEntityCore:
     """
     An emergent entity core that dynamically interacts with a domain module,
     database manager, and holographic memory to process tasks and share knowledge.
     """
-    def __init__(self, domain_module, db_manager, memory):
+    # Numbers the entities of a process, to tell their latencies apart
+    _entity_numbers = itertools.count(1)
+
+    def __init__(self, domain_module, db_manager, memory, result_cache=None, recorder=None, entity_id=None):
         self.components = {
             "domain_module": domain_module,
             "db_manager": db_manager,
             "memory": memory,
+            # Optional ResultCache consulted before the domain module
+            "result_cache": result_cache,
+            # Optional LatencyRecorder timing each stage of interact and collaborate
+            "recorder": recorder,
         }
         self.state = {
             "domain_name": self._determine_domain(),
             "tasks_processed": 0,
+            # Revision of this entity's memory last shared with each peer
+            "shared_revisions": weakref.WeakKeyDictionary(),
         }
+        self.state["entity_id"] = entity_id or self.new_entity_id(self.state["domain_name"])
+
+    @classmethod
+    def new_entity_id(cls, domain):
+        """
+        Returns a new id such as "math-1", for an entity and the memory it owns.
+        """
+        return f"{domain}-{next(cls._entity_numbers)}"
 
     def _determine_domain(self):
         """
@@ -45,11 +85,32 @@ class EmergentEntityCore:
         if task_data is None:
             return f"No task data provided for {self.state['domain_name']} domain."
 
-        # Process the task using the domain module
-        output = self.components["domain_module"].interact(task_data)
+        # Stage timings are only taken while a recorder is enabled
+        recorder = self.components["recorder"]
+        timings = {} if recorder is not None and recorder.enabled else None
+        start = time.perf_counter() if timings is not None else 0.0
 
-        # Encode the task and output in holographic memory
-        self.components["memory"].dynamic_encode(task_data, output)
+        # Process the task using the domain module, unless a cached result exists
+        result_cache = self.components["result_cache"]
+        output = None
+        if result_cache is not None:
+            output = result_cache.get(self.state["domain_name"], task_data)
+            start = self._lap(timings, "cache_lookup", start)
+        if output is None:
+            output = self.components["domain_module"].interact(task_data)
+            start = self._lap(timings, "domain", start)
+            if result_cache is not None:
+                result_cache.put(self.state["domain_name"], task_data, output)
+
+        # Encode the task and output in holographic memory; HolographicMemory
+        # splits this into its hyperdimensional, index and persist stages
+        if timings is None:
+            self.components["memory"].dynamic_encode(task_data, output)
+        else:
+            self.components["memory"].dynamic_encode(task_data, output, timings=timings)
+            timings["total"] = sum(timings.values())
+            task_type = task_data.get("type", "unknown") if isinstance(task_data, dict) else "unknown"
+            recorder.record_stages(self.state["entity_id"], self.state["domain_name"], str(task_type), timings)
 
         # Update internal state
         self.state["tasks_processed"] += 1
@@ -57,19 +118,109 @@ class EmergentEntityCore:
         # Return the result
         return output
 
+    def interact_batch(self, tasks):
+        """
+        Processes a list of tasks and returns their outputs in input order. Cache
+        misses go to the domain module in one batch, and every processed task is
+        encoded into holographic memory in one batch. A task that fails gets an
+        "Error: ..." output without affecting the rest of the batch.
+        """
+        outputs = [None] * len(tasks)
+        domain = self.state["domain_name"]
+        result_cache = self.components["result_cache"]
+        pending = []
+        for i, task_data in enumerate(tasks):
+            if task_data is None:
+                outputs[i] = f"No task data provided for {domain} domain."
+                continue
+            if result_cache is not None:
+                outputs[i] = result_cache.get(domain, task_data)
+            if outputs[i] is None:
+                pending.append(i)
+
+        # Process the cache misses using the domain module
+        domain_module = self.components["domain_module"]
+        if hasattr(domain_module, "interact_batch"):
+            pending_outputs = domain_module.interact_batch([tasks[i] for i in pending])
+        else:
+            pending_outputs = []
+            for i in pending:
+                try:
+                    pending_outputs.append(domain_module.interact(tasks[i]))
+                except Exception as e:
+                    pending_outputs.append(f"Error: {e}")
+        for i, output in zip(pending, pending_outputs):
+            outputs[i] = output
+            if result_cache is not None:
+                result_cache.put(domain, tasks[i], output)
+
+        # Encode the processed tasks and outputs in holographic memory
+        processed = [i for i, task_data in enumerate(tasks) if task_data is not None]
+        self.remember_many([tasks[i] for i in processed], [outputs[i] for i in processed])
+
+        # Update internal state
+        self.state["tasks_processed"] += len(processed)
+        return outputs
+
+    @staticmethod
+    def _lap(timings, stage, start):
+        # Records the time since start as a stage and returns the new start
+        if timings is None:
+            return start
+        now = time.perf_counter()
+        timings[stage] = now - start
+        return now
+
+    def remember_many(self, tasks, outputs):
+        """
+        Encodes a list of processed tasks and their outputs into holographic memory
+        in one batch, falling back to one encode per task for simpler memories.
+        """
+        memory = self.components["memory"]
+        if hasattr(memory, "encode_many"):
+            memory.encode_many(zip(tasks, outputs))
+        else:
+            for task_data, output in zip(tasks, outputs):
+                memory.dynamic_encode(task_data, output)
+
     def collaborate(self, other_entity):
         """
         Shares knowledge with another emergent entity via holographic memory.
+        Memories with their own entity_id only send the entries changed since
+        the last exchange with that peer, as already-encoded vectors; unnamed
+        memories send everything they hold.
         """
-        # Retrieve all shared knowledge
-        shared_memory = self.components["memory"].retrieve_all()
+        recorder = self.components["recorder"]
+        timings = {} if recorder is not None and recorder.enabled else None
+        start = time.perf_counter() if timings is not None else 0.0
 
-        # Create a copy of the shared memory to avoid modifying it during iteration
-        shared_memory_copy = shared_memory.copy()
+        memory = self.components["memory"]
+        other_memory = other_entity.components["memory"]
+        if getattr(memory, "tracks_revisions", False) and hasattr(other_memory, "encode_many"):
+            # Watermarks are kept per peer, so repeated exchanges cost O(new entries)
+            shared_revisions = self.state["shared_revisions"]
+            revision = shared_revisions.get(other_entity, memory.first_revision)
+            entries, shared_revisions[other_entity] = memory.entries_since(revision)
+            start = self._lap(timings, "read", start)
+            other_memory.encode_many(entries)
+        else:
+            # Retrieve all shared knowledge
+            shared_memory = memory.retrieve_all()
+            start = self._lap(timings, "read", start)
 
-        # Dynamically encode the shared memory into the other entity
-        for key, value in shared_memory_copy.items():
-            other_entity.components["memory"].dynamic_encode(key, value)
+            # Create a copy of the shared memory to avoid modifying it during iteration
+            shared_memory_copy = shared_memory.copy()
+
+            # Dynamically encode the shared memory into the other entity
+            if hasattr(other_memory, "encode_many"):
+                other_memory.encode_many(shared_memory_copy.items())
+            else:
+                for key, value in shared_memory_copy.items():
+                    other_memory.dynamic_encode(key, value)
+        if timings is not None:
+            self._lap(timings, "write", start)
+            timings["total"] = timings["read"] + timings["write"]
+            recorder.record_stages(self.state["entity_id"], self.state["domain_name"], "collaborate", timings)
 
         # Inform about the collaboration
         print(
@@ -109,4 +260,27 @@ if __name__ == "__main__":
 
     # Process a task and share knowledge
     print(entity1.interact({"task": "solve equation", "details": "x + 2 = 4"}))
-    entity1.collaborate(entity2)
\ No newline at end of file
+    entity1.collaborate(entity2)
+
+    # Unnamed memories share one set of persisted rows, so they must only
+    # share what they hold: an empty memory sends nothing
+    import tempfile
+    from core.holographic_memory import HolographicMemory
+    db_path = os.path.join(tempfile.mkdtemp(), "memory.db")
+    unrelated = HolographicMemory(db_path=db_path)
+    unrelated.dynamic_encode({"input": "unrelated"}, {"output": "secret"})
+    unrelated.flush()
+    empty = EmergentEntityCore(math_module, db_manager, HolographicMemory(db_path=db_path))
+    peer = EmergentEntityCore(math_module, db_manager, HolographicMemory(db_path=db_path))
+    empty.collaborate(peer)
+    print("Unnamed peer received:", len(peer.components["memory"].retrieve_all()), "entries")
+
+    # A named memory only sends the entries encoded since it started
+    old_run = HolographicMemory(db_path=db_path, entity_id="named")
+    old_run.dynamic_encode({"input": "old run"}, {"output": 1})
+    old_run.flush()
+    named = EmergentEntityCore(math_module, db_manager, HolographicMemory(db_path=db_path, entity_id="named"))
+    named.interact({"task": "new run"})
+    named_peer = EmergentEntityCore(math_module, db_manager, HolographicMemory(db_path=db_path, entity_id="named_peer"))
+    named.collaborate(named_peer)
+    print("Named peer received:", len(named_peer.components["memory"].retrieve_all()), "entries")
\ No newline at end of file
@@ -1,28 +1,398 @@
 import numpy as np
 import sqlite3
 import os
+import sys
 import hashlib
-from scipy.sparse import random as sparse_random
-from scipy.sparse.linalg import norm
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from scipy.sparse import csr_matrix
 
+def get_root_dir():
+    """
+    Gets the absolute path to the root directory of the project.
+
+    Returns:
+        str: The absolute path to the root directory.
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_root_to_path():
+    """
+    Adds the root directory to the Python path.
+    """
+    root_dir = get_root_dir()
+    sys.path.insert(0, root_dir)
+
+add_root_to_path()
+
+from core.vector_store import (
+    MemmapVectorStore,
+    SparseRowIndex,
+    SparseVector,
+    VectorStore,
+    deserialize_vector,
+    serialize_vector,
+)
+from core.holographic_trace import HolographicTrace
+from core.retention import archive_merged_rows, default_archive_dir
+from core.write_behind import WriteBehindWriter
+from core.binary_codes import BinaryQuantizer
+from core.sparse_encoder import SparseEncoder
+
+# Size in bytes of the SHA-256 digests used as memory keys
+DIGEST_SIZE = 32
+
+# Supported layouts for stored hyperdimensional vectors
+LAYOUTS = ("dense", "sparse")
+
+# "index" keeps one vector per entry; "trace" bundles every association into
+# a fixed number of superposition traces and recalls approximately
+MODES = ("index", "trace")
+
+# Fraction of dimensions that are nonzero in every encoded vector
+DENSITY = 0.1
+
+# "memory" keeps vectors in process; "memmap" keeps them in an append-only
+# np.memmap file next to memory.db that other processes can map read-only
+STORAGES = ("memory", "memmap")
+
+# Representations of the similarity index: full float32 rows, or packed sign
+# bits searched by Hamming distance and re-ranked at full precision
+SIMILARITY_CODES = ("float32", "binary")
+
+# Writes one row per (entity_id, input digest). Re-encoding a key updates its
+# row and counts it in seen_count; the revision only advances when the vector
+# actually changes, so repeated syncs do not look like new knowledge.
+UPSERT_MEMORY_ENTRY_SQL = """
+INSERT INTO memory_entries
+    (entity_id, memory_type, content, input_key, vector, vector_layout, vector_dtype, vector_shape,
+     last_seen, revision)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, (SELECT COALESCE(MAX(revision), 0) + 1 FROM memory_entries))
+ON CONFLICT (entity_id, input_key) DO UPDATE SET
+    content = excluded.content,
+    vector = excluded.vector,
+    vector_layout = excluded.vector_layout,
+    vector_dtype = excluded.vector_dtype,
+    vector_shape = excluded.vector_shape,
+    seen_count = seen_count + 1,
+    last_seen = excluded.last_seen,
+    revision = CASE WHEN vector IS excluded.vector THEN revision ELSE excluded.revision END
+"""
+
+# Policies for choosing which entries leave a capacity-bounded memory
+EVICTION_POLICIES = ("lru", "lfu", "age")
+
+# Warm-start strategies for reloading persisted vectors on startup
+WARM_STARTS = (None, "lazy", "background")
+
+# Rows of memories created without an entity_id are written under this id
+DEFAULT_ENTITY_ID = "default_entity"
+
+# Number of persisted rows deserialized per batch during a bulk reload
+LOAD_BATCH_SIZE = 1024
+
+# Number of pairs encoded, stored and queued for persistence per batch of encode_many
+ENCODE_BATCH_SIZE = 256
+
+# Initial number of rows allocated for the similarity index
+INITIAL_SIMILARITY_CAPACITY = 1024
+
+# Default number of encoded vectors kept by each encoder cache
+DEFAULT_ENCODER_CACHE_SIZE = 4096
+
+# Default byte bound of each encoder cache. 4096 dense float64 vectors of
+# 16384 dimensions would take 512 MB, so the byte bound usually applies first
+DEFAULT_ENCODER_CACHE_BYTES = 64 * 1024 * 1024
+
+# Largest share of max_bytes that the private encoder cache of a byte-bounded
+# memory may take; the cache counts against the budget of the memory
+ENCODER_CACHE_BUDGET_SHARE = 0.5
+
+class EncoderCache:
+    """
+    A bounded LRU cache of hyperdimensional vectors, keyed on the canonical
+    SHA-256 digest of the encoded input (plus the encoding dimensions). It
+    holds at most max_entries vectors and max_bytes bytes of vector data.
+    A single instance may be shared by any number of HolographicMemory objects.
+    """
+    def __init__(self, max_entries=DEFAULT_ENCODER_CACHE_SIZE, max_bytes=DEFAULT_ENCODER_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        """
+        Returns the cached vector for a key, or None on a miss.
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return vector
+
+    def put(self, key, vector):
+        """
+        Stores a vector, evicting the least recently used entries when full.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[key] = vector
+            self.nbytes += vector.nbytes
+            self._evict_overflow()
+
+    def _evict_overflow(self):
+        while self._entries and (
+            len(self._entries) > max(self.max_entries, 0)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, vector = self._entries.popitem(last=False)
+            self.nbytes -= vector.nbytes
+            self.stats["evictions"] += 1
+
+    def resize(self, max_entries):
+        """
+        Changes the capacity of the cache, evicting entries if it shrinks.
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            self._evict_overflow()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get_stats(self):
+        """
+        Returns a snapshot of the cache counters and its hit rate.
+        """
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.stats["hits"],
+                "misses": self.stats["misses"],
+                "evictions": self.stats["evictions"],
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+_shared_encoder_cache = None
+_shared_encoder_cache_lock = threading.Lock()
+
+def get_shared_encoder_cache(max_entries=None):
+    """
+    Returns the process-wide encoder cache, creating it on first use.
+    Passing max_entries resizes the shared cache.
+    """
+    global _shared_encoder_cache
+    with _shared_encoder_cache_lock:
+        if _shared_encoder_cache is None:
+            _shared_encoder_cache = EncoderCache(
+                DEFAULT_ENCODER_CACHE_SIZE if max_entries is None else max_entries
+            )
+        elif max_entries is not None:
+            _shared_encoder_cache.resize(max_entries)
+        return _shared_encoder_cache
+
 class HolographicMemory:
-    def __init__(self, dimensions=16384):
+    def __init__(self, dimensions=16384, encoder_cache=None, cache_size=DEFAULT_ENCODER_CACHE_SIZE,
+                 layout="dense", dtype=np.float64, similarity_index=False,
+                 mode="index", traces=1, trace_codebook=True,
+                 entity_id=None, warm_start=None, storage="memory", read_only=False,
+                 encode_workers=1, flush_rows=256, flush_interval_ms=50, durability="normal",
+                 max_entries=None, max_bytes=None, eviction="lru", spill=True,
+                 similarity_codes="float32", code_bits=None, rerank=64, encoder="compat",
+                 density=DENSITY, db_path=None):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unsupported layout: {layout}")
+        if mode not in MODES:
+            raise ValueError(f"Unsupported mode: {mode}")
+        if mode == "trace" and similarity_index:
+            raise ValueError("The similarity index is only available in index mode.")
+        if warm_start not in WARM_STARTS:
+            raise ValueError(f"Unsupported warm start: {warm_start}")
+        if storage not in STORAGES:
+            raise ValueError(f"Unsupported storage: {storage}")
+        spills = (max_entries is not None or max_bytes is not None) and spill
+        if entity_id is None and (warm_start is not None or storage == "memmap" or spills):
+            # Memories without an id would reload each other's entries
+            raise ValueError("Warm start, memmap storage and spilling need an explicit entity_id.")
+        if read_only and storage != "memmap":
+            raise ValueError("Only memmap storage can be opened read-only.")
+        if similarity_codes not in SIMILARITY_CODES:
+            raise ValueError(f"Unsupported similarity codes: {similarity_codes}")
+        if similarity_codes == "binary" and code_bits is None and rerank <= 0:
+            # Mean-thresholded codes only rank candidates; scores come from reranking
+            raise ValueError("Binary codes without code_bits need rerank > 0 to score results.")
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unsupported eviction policy: {eviction}")
+        if mode == "trace" and (max_entries is not None or max_bytes is not None):
+            raise ValueError("A trace has a fixed size and cannot be capacity-bounded.")
         self.dimensions = dimensions
+        # "compat" keeps the vectors of earlier releases; "fast" is O(nnz).
+        # density is the fraction of nonzero dimensions in every vector
+        self.density = density
+        self.encoder = SparseEncoder(dimensions, density, encoder)
+        self.entity_id = entity_id or DEFAULT_ENTITY_ID
+        self.storage = storage
+        self.read_only = read_only
+        self.mode = mode
+        self.trace = HolographicTrace(dimensions, traces, trace_codebook, dtype=dtype) if mode == "trace" else None
+
+        # Vectors are stored either as dense arrays or as SparseVector
+        # index/value pairs, with values of the given floating point dtype
+        self.layout = layout
+        self.dtype = np.dtype(dtype)
+
+        # Primary index: 32-byte input digest -> slot in the vector store
         self.memory = {}
+        self.vectors = VectorStore()
+
+        # _lock guards the index, vector store, similarity matrix and trace;
+        # _db_lock serializes this memory's SQLite writes. Encoding runs
+        # outside both, so a thread pool can encode concurrently.
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        # Optional capacity budgets. Entries beyond them are evicted by the
+        # selected policy; with spill enabled an evicted entry stays in the
+        # SQLite tier (every encode is persisted) and faults back in on retrieve
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.spill = spill
+        self.bounded = max_entries is not None or max_bytes is not None
+        self._residency = OrderedDict()
+        self._frequency = {}
+        self._frequency_heap = []
+        self._heap_counter = itertools.count()
+        self._resident_bytes = 0
+        self._spilled = set()
+        self._dropped = set()
+        self.capacity_counters = {"evictions": 0, "fault_ins": 0}
+
+        # Cache misses in a batch are generated on this many threads
+        self.encode_workers = encode_workers
+        self._executor = None
+
+        # Optional similarity index over the input vector of each entry, stored
+        # under the same slot as its output. Inputs are kept as sparse float32
+        # rows of CSR chunks, or with similarity_codes="binary" as packed sign
+        # bits (optionally of a code_bits random projection) in one contiguous
+        # matrix, whose top rerank Hamming candidates are re-scored against
+        # regenerated input vectors. The float32 rows are scored exactly, but a
+        # query touches every stored nonzero (about 220 ms at 100k entries on
+        # one core); binary codes with code_bits=256 keep a query at 100k
+        # entries in single-digit milliseconds and are the path to use at scale
+        self.similarity_index = similarity_index
+        self.similarity_codes = similarity_codes
+        self.rerank = rerank
+        self.quantizer = None
+        self._input_index = None
+        if similarity_codes == "binary":
+            self.quantizer = BinaryQuantizer(dimensions, code_bits)
+            self._input_matrix = np.zeros((0, self.quantizer.code_bytes), dtype=np.uint8)
+        else:
+            self._input_index = SparseRowIndex(dimensions, np.float32)
+            self._input_matrix = np.zeros((0, 0), dtype=np.float32)
+        self._input_valid = np.zeros(0, dtype=bool)
+        self._input_keys = {}
+        self._input_rows = 0
+
+        # encoder_cache may be an EncoderCache instance, "shared" for the
+        # process-wide cache, or None for a private cache of cache_size entries.
+        # A private cache counts against max_bytes, and takes at most
+        # ENCODER_CACHE_BUDGET_SHARE of it
+        self._private_cache = encoder_cache is None
+        if encoder_cache == "shared":
+            encoder_cache = get_shared_encoder_cache()
+        elif encoder_cache is None:
+            cache_bytes = DEFAULT_ENCODER_CACHE_BYTES
+            if max_bytes is not None:
+                cache_bytes = min(cache_bytes, int(max_bytes * ENCODER_CACHE_BUDGET_SHARE))
+            encoder_cache = EncoderCache(cache_size, cache_bytes)
+        self.encoder_cache = encoder_cache
         
-        # Adjust the path to the data directory
+        # Adjust the path to the data directory, unless a database path is given
         main_directory = os.path.dirname(os.path.dirname(__file__))  # Navigate up to the main directory
-        self.db_path = os.path.join(main_directory, "data", "memory.db")
+        self.db_path = db_path or os.path.join(main_directory, "data", "memory.db")
         
         # Ensure the data directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
         self._initialize_db()
 
+        # Encodes are persisted write-behind: rows are queued and written in
+        # batched transactions over one long-lived WAL connection
+        self._writer = None
+        if not read_only:
+            self._writer = WriteBehindWriter(
+                self.db_path,
+                UPSERT_MEMORY_ENTRY_SQL,
+                flush_rows=flush_rows,
+                flush_interval_ms=flush_interval_ms,
+                durability=durability,
+            )
+
+        if storage == "memmap":
+            # The memmap index already holds every entry written by earlier runs
+            safe_entity_id = re.sub(r"[^\w.-]", "_", self.entity_id)
+            self.vectors = MemmapVectorStore(
+                os.path.join(os.path.dirname(self.db_path), f"memory_{safe_entity_id}"),
+                dimensions,
+                layout,
+                self.dtype,
+                nnz=self.encoder.nnz if layout == "sparse" else None,
+                read_only=read_only,
+            )
+            self._load_store_index()
+
+        # Warm start from the vectors persisted by earlier runs: "lazy" faults
+        # entries in on first access, "background" bulk-loads them on a thread
+        # while misses still fault in, and None starts from an empty memory
+        self._persisted_keys = None
+        self._fully_loaded = warm_start is None
+        self._startup_revision = 0 if warm_start is None else self._max_revision()
+
+        # entries_since() reads the persisted rows of entity_id, which only
+        # describe this memory when the id is its own. Rows that earlier runs
+        # persisted belong to it only when it warm starts or maps them
+        self.tracks_revisions = entity_id is not None
+        self.first_revision = 0
+        if self.tracks_revisions and warm_start is None and storage != "memmap":
+            self.first_revision = self._max_revision()
+        self._loader = None
+        if warm_start == "background":
+            self._loader = threading.Thread(target=self.load_all, daemon=True)
+            self._loader.start()
+
     def _initialize_db(self):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        # Only affects a new file: lets retention runs release pruned pages
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS memory_entries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,54 +402,870 @@ class HolographicMemory:
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         """)
+
+        # Older databases only stored a text repr of each vector; add the
+        # columns that hold the binary vector and the key it was stored under
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(memory_entries)")}
+        for column, column_type in (
+            ("input_key", "BLOB"),
+            ("vector", "BLOB"),
+            ("vector_layout", "TEXT"),
+            ("vector_dtype", "TEXT"),
+            ("vector_shape", "TEXT"),
+            ("seen_count", "INTEGER DEFAULT 1"),
+            ("last_seen", "DATETIME"),
+            ("revision", "INTEGER"),
+        ):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE memory_entries ADD COLUMN {column} {column_type}")
+
+        # Databases written before entries were upserted hold one row per
+        # encode; keep the latest row of each key, carrying the count over,
+        # and archive the older rows rather than dropping them
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_memory_entries_entry'")
+        if cursor.fetchone() is None:
+            cursor.execute("UPDATE memory_entries SET revision = id WHERE revision IS NULL")
+            cursor.execute("""
+            UPDATE memory_entries SET
+                seen_count = (
+                    SELECT COUNT(*) FROM memory_entries AS other
+                    WHERE other.entity_id = memory_entries.entity_id AND other.input_key = memory_entries.input_key
+                ),
+                last_seen = timestamp
+            WHERE id IN (
+                SELECT MAX(id) FROM memory_entries WHERE input_key IS NOT NULL GROUP BY entity_id, input_key
+            )
+            """)
+            ids = [row[0] for row in cursor.execute("""
+            SELECT id FROM memory_entries
+            WHERE input_key IS NOT NULL AND id NOT IN (
+                SELECT MAX(id) FROM memory_entries WHERE input_key IS NOT NULL GROUP BY entity_id, input_key
+            )
+            """).fetchall()]
+            if archive_merged_rows(cursor, self.db_path, "memory_entries", ids):
+                print(f"Merged {len(ids)} duplicate memory entries; archived them in {default_archive_dir(self.db_path)}.")
+            cursor.execute("""
+            CREATE UNIQUE INDEX idx_memory_entries_entry
+            ON memory_entries (entity_id, input_key)
+            """)
+            cursor.execute("DROP INDEX IF EXISTS idx_memory_entries_key")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memory_entries_revision ON memory_entries (revision)")
         conn.commit()
         conn.close()
 
-    def dynamic_encode(self, input_vector, output_vector):
-        input_hd = self._to_hyperdimensional(input_vector)
-        output_hd = self._to_hyperdimensional(output_vector)
-        self.memory[tuple(input_hd)] = output_hd
+    def dynamic_encode(self, input_vector, output_vector, timings=None):
+        # Inputs may be raw task data or keys taken from retrieve_all(), and
+        # outputs may be raw data or vectors that are already hyperdimensional.
+        # A timings dict is filled with the seconds spent in each stage
+        if timings is None:
+            key = self._key(input_vector)
+            output_hd = self._as_hyperdimensional(output_vector)
+            self._store_many([key], [output_hd])
+            self._persist([key], [output_hd], [output_vector])
+            return
+        start = time.perf_counter()
+        key = self._key(input_vector)
+        output_hd = self._as_hyperdimensional(output_vector)
+        encoded = time.perf_counter()
+        self._store_many([key], [output_hd])
+        stored = time.perf_counter()
+        self._persist([key], [output_hd], [output_vector])
+        timings["hyperdimensional"] = encoded - start
+        timings["index"] = stored - encoded
+        timings["persist"] = time.perf_counter() - stored
+
+    def encode_many(self, pairs):
+        """
+        Encodes an iterable of (input, output) pairs in batches of
+        ENCODE_BATCH_SIZE. Vectors missing from the encoder cache are generated
+        per batch, and the rows of a batch are queued for the write-behind
+        writer together. A bounded memory evicts after every batch, so only one
+        batch of vectors is held beyond its budget.
+        """
+        pairs = list(pairs)
+        for start in range(0, len(pairs), ENCODE_BATCH_SIZE):
+            batch = pairs[start:start + ENCODE_BATCH_SIZE]
+            keys = [self._key(input_vector) for input_vector, _ in batch]
+            outputs = self._as_hyperdimensional_many([output_vector for _, output_vector in batch])
+            self._store_many(keys, outputs)
+            self._persist(keys, outputs, [output_vector for _, output_vector in batch])
+
+    def _store_many(self, keys, outputs):
+        if self.read_only:
+            raise ValueError("This HolographicMemory is mapped read-only.")
+        if self.mode == "trace":
+            # Re-encoding a key in trace mode superposes the new value on the old one
+            key_vectors = [self._dense(vector) for vector in self._encode_digests(keys)]
+            with self._lock:
+                self.trace.bind_many(keys, key_vectors, outputs, [self._dense(vector) for vector in outputs])
+            return
+        if self.layout == "sparse" and isinstance(self.vectors, MemmapVectorStore):
+            # Memmap records hold a fixed number of nonzeros, so every vector is
+            # checked (and sparser ones padded) before any of them is stored
+            outputs = [self.vectors.fit_record(vector) for vector in outputs]
+        with self._lock:
+            for key, output_hd in zip(keys, outputs):
+                self._store(key, output_hd)
+            if self.bounded:
+                self._enforce_budget(set(keys))
+            self.vectors.flush()
+            if self.vectors.needs_compaction():
+                self.compact()
+
+    def _dense(self, vector):
+        return vector.toarray() if isinstance(vector, SparseVector) else vector
+
+    def _store(self, key, output_hd):
+        slot = self.memory.get(key)
+        if self.bounded:
+            old_bytes = 0 if slot is None else self._entry_bytes(self.vectors.get(slot))
+            self._resident_bytes += self._entry_bytes(output_hd) - old_bytes
+            self._track_insert(key)
+            self._spilled.discard(key)
+            self._dropped.discard(key)
+        if slot is None:
+            slot = self.vectors.append(output_hd, key)
+            self.memory[key] = slot
+            if self.similarity_index:
+                self._index_input(slot, key)
+        else:
+            # Append-only stores write overwrites to a new slot
+            new_slot = self.vectors.set(slot, output_hd, key)
+            if new_slot != slot:
+                self.memory[key] = new_slot
+                if self.similarity_index:
+                    self._unindex_input(slot)
+                    self._index_input(new_slot, key)
+
+    def _entry_bytes(self, vector):
+        # Budgeted bytes per entry: the stored vector plus its similarity row,
+        # which holds an int32 index and a float32 value per nonzero
+        if self.quantizer is not None:
+            row_bytes = self.quantizer.code_bytes
+        else:
+            row_bytes = self.encoder.nnz * 8
+        return vector.nbytes + (row_bytes if self.similarity_index else 0)
+
+    def _track_insert(self, key):
+        self._residency[key] = None
+        self._residency.move_to_end(key)
+        self._track_access(key)
+
+    def _track_access(self, key):
+        if self.eviction == "lru":
+            self._residency.move_to_end(key)
+        elif self.eviction == "lfu":
+            count = self._frequency.get(key, 0) + 1
+            self._frequency[key] = count
+            heapq.heappush(self._frequency_heap, (count, next(self._heap_counter), key))
+            # Rebuild the heap once stale entries outnumber live ones
+            if len(self._frequency_heap) > 2 * len(self._frequency) + 1024:
+                self._frequency_heap = [
+                    (count, next(self._heap_counter), key) for key, count in self._frequency.items()
+                ]
+                heapq.heapify(self._frequency_heap)
+
+    def _next_victim(self, protected):
+        if self.eviction == "lfu":
+            # The heap holds stale (count, key) pairs; skip them lazily
+            skipped = []
+            victim = None
+            while self._frequency_heap:
+                count, order, key = heapq.heappop(self._frequency_heap)
+                if self._frequency.get(key) != count:
+                    continue
+                if key in protected:
+                    skipped.append((count, order, key))
+                    continue
+                victim = key
+                break
+            for entry in skipped:
+                heapq.heappush(self._frequency_heap, entry)
+            if victim is not None or not skipped:
+                return victim
+            return skipped[0][2]
+        # The residency order is least recently used first for "lru" and
+        # oldest insertion first for "age"
+        for key in self._residency:
+            if key not in protected:
+                return key
+        return next(iter(self._residency), None)
+
+    def _over_budget(self):
+        return (
+            (self.max_entries is not None and len(self.memory) > self.max_entries)
+            or (self.max_bytes is not None and self._resident_bytes + self._cache_bytes() > self.max_bytes)
+        )
+
+    def _cache_bytes(self):
+        return self.encoder_cache.nbytes if self._private_cache else 0
+
+    def _enforce_budget(self, protected):
+        # Entries written by the current batch are only evicted as a last resort
+        while self.memory and self._over_budget():
+            key = self._next_victim(protected)
+            if key is None:
+                break
+            self._evict(key)
+
+    def _evict(self, key):
+        slot = self.memory.pop(key)
+        self._resident_bytes -= self._entry_bytes(self.vectors.get(slot))
+        self._residency.pop(key, None)
+        self._frequency.pop(key, None)
+        if self.similarity_index:
+            self._unindex_input(slot)
+        self.vectors.release(slot)
+        # Without spill an evicted entry is dropped and never faulted back in
+        (self._spilled if self.spill else self._dropped).add(key)
+        self.capacity_counters["evictions"] += 1
+
+    def capacity_stats(self):
+        """
+        Returns residency, eviction and fault-in counters for the capacity budgets.
+        """
+        with self._lock:
+            return {
+                "resident_entries": len(self.memory),
+                "resident_bytes": self._resident_bytes,
+                "encoder_cache_bytes": self._cache_bytes(),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "eviction": self.eviction,
+                "spilled_entries": len(self._spilled),
+                "evictions": self.capacity_counters["evictions"],
+                "fault_ins": self.capacity_counters["fault_ins"],
+            }
+
+    def _load_store_index(self):
+        self.memory = self.vectors.keys()
+        if self.bounded:
+            self._residency = OrderedDict((key, None) for key in self.memory)
+            self._frequency = {}
+            self._frequency_heap = []
+            self._resident_bytes = 0
+            for key, slot in self.memory.items():
+                self._resident_bytes += self._entry_bytes(self.vectors.get(slot))
+                self._track_access(key)
+            if not self.read_only:
+                self._enforce_budget(set())
+        if self.similarity_index:
+            self._reset_input_index()
+            for key, slot in self.memory.items():
+                self._index_input(slot, key)
+
+    def compact(self):
+        """
+        Compacts an append-only vector store, dropping rows left dead by
+        overwrites, and remaps the index to the new slots.
+        """
+        with self._lock:
+            if self.vectors.compact():
+                self._load_store_index()
+
+    def refresh(self):
+        """
+        Picks up entries appended or compacted by the process that writes a
+        shared memmap store. Used by read-only readers.
+        """
+        with self._lock:
+            self.vectors.refresh()
+            self._load_store_index()
+
+    def _writer_flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """
+        Flushes pending writes and releases the connection, threads and files.
+        """
+        if self._writer is not None:
+            self._writer.close()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.vectors.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _index_input(self, slot, key):
+        # Input vectors are regenerated from the digest, so they come straight
+        # from the encoder cache when the key was seen recently
+        input_hd = self._encode_digests([key])[0]
+        self._input_keys[slot] = key
+        if self.quantizer is None:
+            self._input_index.add(slot, input_hd)
+            return
+        if slot >= len(self._input_matrix):
+            # Grow geometrically so inserts stay amortized O(dimensions)
+            capacity = max(slot + 1, 2 * len(self._input_matrix), INITIAL_SIMILARITY_CAPACITY)
+            matrix = np.zeros((capacity, self._input_matrix.shape[1]), dtype=self._input_matrix.dtype)
+            matrix[:self._input_rows] = self._input_matrix[:self._input_rows]
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:self._input_rows] = self._input_valid[:self._input_rows]
+            self._input_matrix, self._input_valid = matrix, valid
+        self._input_matrix[slot] = self.quantizer.quantize(input_hd)
+        self._input_valid[slot] = True
+        self._input_rows = max(self._input_rows, slot + 1)
+
+    def _unindex_input(self, slot):
+        self._input_keys.pop(slot, None)
+        if self.quantizer is None:
+            self._input_index.remove(slot)
+        else:
+            self._input_valid[slot] = False
+
+    def _reset_input_index(self):
+        self._input_keys = {}
+        if self.quantizer is None:
+            self._input_index.clear()
+        else:
+            self._input_valid[:] = False
+            self._input_rows = 0
+
+    def retrieve_similar(self, input_vector, k=5, min_score=0.0, dense=False):
+        """
+        Returns up to k (key, score, output) tuples for the stored inputs most
+        similar to input_vector, best first. Stored vectors are unit length, so
+        the cosine scores for the whole memory come from sparse matrix-vector
+        products (or Hamming distances over binary codes, which large memories
+        need for low-latency queries).
+        input_vector may be raw data or an already-encoded hyperdimensional vector.
+        """
+        if not self.similarity_index:
+            raise ValueError("Similarity search requires HolographicMemory(similarity_index=True).")
+        self.load_all()
+        if k <= 0:
+            return []
+
+        if self._is_hyperdimensional(input_vector):
+            query = input_vector
+        else:
+            query = self._to_hyperdimensional(input_vector)
+        if isinstance(query, SparseVector):
+            query = query.toarray(np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+
+        with self._lock:
+            if self.quantizer is not None:
+                if self._input_rows == 0:
+                    return []
+                scores = self._binary_scores(query / query_norm, k)
+                scores[~self._input_valid[:self._input_rows]] = -np.inf
+                slots = np.arange(self._input_rows)
+            else:
+                slots, scores = self._input_index.scores(query / query_norm)
+                if len(slots) == 0:
+                    return []
+            k = min(k, len(scores))
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            candidates = candidates[np.argsort(-scores[candidates])]
+
+            results = []
+            for candidate in candidates:
+                slot = int(slots[candidate])
+                score = float(scores[candidate])
+                if score < min_score:
+                    break
+                results.append((self._input_keys[slot], score, self._materialize(self.vectors.get(slot), dense)))
+            return results
+
+    def _binary_scores(self, query, k):
+        # Hamming distances over the packed codes rank the entries (and with a
+        # projection and no rerank give estimated cosines); the closest rerank
+        # candidates are then re-scored exactly against their input vectors,
+        # regenerated from the digest (or the encoder cache)
+        rows = self._input_rows
+        distances = self.quantizer.hamming(self._input_matrix[:rows], self.quantizer.quantize(query))
+        if self.quantizer.projection is None or self.rerank > 0:
+            scores = -distances.astype(np.float32)
+        else:
+            scores = self.quantizer.estimated_cosine(distances).astype(np.float32)
+        valid = self._input_valid[:rows]
+        scores[~valid] = -np.inf
+        shortlist = min(max(k, self.rerank), int(valid.sum()))
+        if self.rerank <= 0 or shortlist == 0:
+            return scores
+        candidates = np.argpartition(-scores, shortlist - 1)[:shortlist]
+        exact = np.full(rows, -np.inf, dtype=np.float32)
+        input_vectors = self._encode_digests([self._input_keys[slot] for slot in candidates])
+        for slot, input_hd in zip(candidates, input_vectors):
+            if isinstance(input_hd, SparseVector):
+                exact[slot] = float(np.dot(input_hd.values, query[input_hd.indices]))
+            else:
+                exact[slot] = float(np.dot(input_hd, query))
+        return exact
+
+    def _persist(self, keys, vectors, raw_outputs):
+        # Vectors are written as binary blobs with their layout, dtype and shape;
+        # content keeps a readable form of the raw output when there is one
+        rows = []
+        for key, vector, raw_output in zip(keys, vectors, raw_outputs):
+            blob, layout, dtype, shape = serialize_vector(vector)
+            content = "" if self._is_hyperdimensional(raw_output) else str(raw_output)
+            rows.append((self.entity_id, "dynamic_encode", content, key, blob, layout, dtype, shape))
+        self._writer.submit(rows)
+        with self._db_lock:
+            if self._persisted_keys is not None:
+                self._persisted_keys.update(keys)
+
+    def flush(self):
+        """
+        Writes every queued memory entry to SQLite and flushes the vector store.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+        with self._lock:
+            self.vectors.flush()
+
+    def persistence_stats(self):
+        """
+        Returns the write-behind queue depth and flush latency metrics.
+        """
+        return self._writer.get_metrics() if self._writer is not None else {}
+
+    def _max_revision(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(revision), 0) FROM memory_entries")
+        max_revision = cursor.fetchone()[0]
+        conn.close()
+        return max_revision
+
+    def entries_since(self, revision=0):
+        """
+        Returns the (key, vector) pairs whose vector changed after the given
+        revision, oldest first, and the revision to pass on the next call.
+        Only the changed rows are read, through the revision index, and the
+        vectors come back already encoded. Revisions before first_revision
+        belong to earlier runs and are skipped.
+        """
+        if not self.tracks_revisions:
+            # Every unnamed memory persists under the same default id
+            raise ValueError("entries_since() needs a HolographicMemory with an explicit entity_id.")
+        revision = max(revision, self.first_revision)
+        self._writer_flush()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute("""
-        INSERT INTO memory_entries (entity_id, memory_type, content)
-        VALUES (?, ?, ?)
-        """, ("default_entity", "dynamic_encode", str(output_hd)))
-        conn.commit()
+        SELECT input_key, vector, vector_layout, vector_dtype, vector_shape, revision FROM memory_entries
+        WHERE entity_id = ? AND input_key IS NOT NULL AND vector IS NOT NULL AND revision > ?
+        ORDER BY revision
+        """, (self.entity_id, revision))
+        entries = []
+        for key, *packed, entry_revision in cursor.fetchall():
+            revision = entry_revision
+            vector = deserialize_vector(*packed)
+            if self._is_hyperdimensional(vector):
+                entries.append((key, self._to_storage(vector)))
         conn.close()
+        return entries, revision
 
-    def retrieve(self, input_vector):
-        input_hd = self._to_hyperdimensional(input_vector)
-        return self.memory.get(tuple(input_hd), None)
+    def _load_persisted_keys(self):
+        # Maps which keys have persisted vectors, so misses for unknown keys
+        # never touch the database again
+        with self._db_lock:
+            if self._persisted_keys is None:
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                cursor.execute("""
+                SELECT DISTINCT input_key FROM memory_entries
+                WHERE entity_id = ? AND vector IS NOT NULL
+                """, (self.entity_id,))
+                self._persisted_keys = {row[0] for row in cursor.fetchall()}
+                conn.close()
+            return self._persisted_keys
 
-    def retrieve_all(self):
-        return self.memory
+    def _fault_in(self, key):
+        """
+        Loads the latest persisted vector for a key into memory and returns it.
+        """
+        if self.read_only:
+            return self._read_only_miss(key)
+        if key in self._dropped:
+            return None
+        if key not in self._spilled and (self._fully_loaded or key not in self._load_persisted_keys()):
+            return None
+        # The row may still be waiting in the write-behind queue
+        self._writer_flush()
+        vector = self._persisted_vector(key)
+        if vector is None:
+            return None
+        with self._lock:
+            if key not in self.memory:
+                self._store(key, vector)
+                self.capacity_counters["fault_ins"] += 1
+                if self.bounded:
+                    self._enforce_budget({key})
+            return self.vectors.get(self.memory[key])
 
-    def _to_hyperdimensional(self, vector):
+    def _persisted_vector(self, key):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT vector, vector_layout, vector_dtype, vector_shape FROM memory_entries
+        WHERE entity_id = ? AND input_key = ? AND vector IS NOT NULL
+        ORDER BY id DESC LIMIT 1
+        """, (self.entity_id, key))
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        vector = deserialize_vector(*row)
+        return self._to_storage(vector) if self._is_hyperdimensional(vector) else None
+
+    def _read_only_miss(self, key):
+        # A read-only reader cannot store entries. It remaps the shared store
+        # when the writer has appended to it since, and with a warm start
+        # returns rows that only exist in SQLite without keeping them
+        with self._lock:
+            if self.vectors.is_stale():
+                self.refresh()
+            slot = self.memory.get(key)
+            if slot is not None:
+                return self.vectors.get(slot)
+        if self._fully_loaded:
+            return None
+        return self._persisted_vector(key)
+
+    def load_all(self):
+        """
+        Bulk-loads the persisted vector of every key that is not already in
+        memory. Called on first full access, or on a thread at startup. A trace
+        only loads entries whose revision predates startup, so entries encoded
+        since then are never bound twice. A read-only reader only remaps the
+        shared store, which holds every entry its writer has stored.
+        """
+        if self.read_only:
+            with self._lock:
+                if self.vectors.is_stale():
+                    self.refresh()
+            return
+        with self._load_lock:
+            if self._fully_loaded:
+                return
+            max_revision = self._startup_revision if self.mode == "trace" else None
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("""
+            SELECT input_key, vector, vector_layout, vector_dtype, vector_shape FROM memory_entries
+            WHERE entity_id = ? AND input_key IS NOT NULL AND vector IS NOT NULL
+                AND (? IS NULL OR revision <= ?)
+            """, (self.entity_id, max_revision, max_revision))
+            while True:
+                rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                keys, vectors = [], []
+                for key, *packed in rows:
+                    vector = deserialize_vector(*packed)
+                    if self._is_hyperdimensional(vector):
+                        keys.append(key)
+                        vectors.append(self._to_storage(vector))
+                # Writers may run between batches; never replace their newer entries
+                with self._lock:
+                    fresh = [(key, vector) for key, vector in zip(keys, vectors) if key not in self.memory]
+                    if fresh:
+                        self._store_many(*map(list, zip(*fresh)))
+            conn.close()
+            self._fully_loaded = True
+
+    def retrieve(self, input_vector, dense=False):
+        key = self._key(input_vector)
+        if self.mode == "trace":
+            return self._recall(key, dense)
+        vector = self._lookup(key)
+        if vector is None:
+            return None
+        return self._materialize(vector, dense)
+
+    def _lookup(self, key):
+        with self._lock:
+            slot = self.memory.get(key)
+            if slot is not None:
+                if self.bounded:
+                    self._track_access(key)
+                return self.vectors.get(slot)
+        return self._fault_in(key)
+
+    def _recall(self, key, dense):
+        # A trace cannot fault single keys in, so it is rebuilt in one pass
+        self.load_all()
+        key_vector = self._dense(self._encode_digests([key])[0])
+        with self._lock:
+            value = self.trace.recall(key, key_vector)
+        if isinstance(value, SparseVector):
+            value = self._to_storage(value)
+        return self._materialize(value, dense)
+
+    def retrieve_many(self, input_vectors, dense=False):
+        """
+        Retrieves the stored outputs for several inputs, in order, with None for misses.
+        """
+        if self.mode == "trace":
+            return [self.retrieve(input_vector, dense) for input_vector in input_vectors]
+        results = []
+        for input_vector in input_vectors:
+            vector = self._lookup(self._key(input_vector))
+            results.append(None if vector is None else self._materialize(vector, dense))
+        return results
+
+    def retrieve_all(self, dense=False):
+        # Maps each input digest to its stored output vector; the keys can be
+        # passed straight back to dynamic_encode() to share knowledge. A trace
+        # does not keep its keys, so there is nothing to enumerate in trace mode.
+        self.load_all()
+        with self._lock:
+            return {
+                key: self._materialize(self.vectors.get(slot), dense)
+                for key, slot in self.memory.items()
+            }
+
+    def memory_usage(self):
+        """
+        Returns the approximate number of bytes held by the index and the stored vectors.
+        """
+        with self._lock:
+            return self._memory_usage()
+
+    def _memory_usage(self):
+        index_bytes = sys.getsizeof(self.memory) + sum(
+            sys.getsizeof(key) + sys.getsizeof(slot) for key, slot in self.memory.items()
+        )
+        vector_bytes = sum(self.vectors.get(slot).nbytes for slot in self.memory.values())
+        similarity_bytes = self._input_matrix.nbytes + self._input_valid.nbytes
+        if self._input_index is not None:
+            similarity_bytes += self._input_index.nbytes
+        usage = {
+            "entries": len(self.memory),
+            "index_bytes": index_bytes,
+            "vector_bytes": vector_bytes,
+            "similarity_bytes": similarity_bytes,
+        }
+        if self.mode == "trace":
+            usage["entries"] = int(self.trace.loads.sum())
+            usage.update(self.trace.memory_usage())
+        usage["total_bytes"] = sum(value for name, value in usage.items() if name.endswith("_bytes"))
+        return usage
+
+    def trace_stats(self):
+        """
+        Returns the capacity and recall statistics of the superposition traces.
+        """
+        if self.mode != "trace":
+            raise ValueError("Trace statistics require HolographicMemory(mode=\"trace\").")
+        return self.trace.get_stats()
+
+    def measure_recall(self, pairs):
+        """
+        Returns the fraction of (input, output) pairs whose output is recovered
+        exactly by retrieve(). This is always 1.0 for stored pairs in index mode
+        and measures approximate recall in trace mode.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return 0.0
+        expected = self._as_hyperdimensional_many([output_vector for _, output_vector in pairs])
+        recalled = self.retrieve_many([input_vector for input_vector, _ in pairs], dense=True)
+        correct = sum(
+            vector is not None and np.array_equal(vector, self._dense(target))
+            for vector, target in zip(recalled, expected)
+        )
+        return correct / len(pairs)
+
+    def _materialize(self, vector, dense):
+        if dense and isinstance(vector, SparseVector):
+            return vector.toarray()
+        return vector
+
+    def _key(self, vector):
+        if isinstance(vector, bytes) and len(vector) == DIGEST_SIZE:
+            return vector
+        return self._digest(vector)
+
+    def _as_hyperdimensional(self, vector):
+        return self._as_hyperdimensional_many([vector])[0]
+
+    def _as_hyperdimensional_many(self, vectors):
+        results = [None] * len(vectors)
+        pending_indices, pending_digests = [], []
+        for i, vector in enumerate(vectors):
+            if self._is_hyperdimensional(vector):
+                results[i] = self._to_storage(vector)
+            else:
+                pending_indices.append(i)
+                pending_digests.append(self._digest(vector))
+        for i, hd_vector in zip(pending_indices, self._encode_digests(pending_digests)):
+            results[i] = hd_vector
+        return results
+
+    def _is_hyperdimensional(self, vector):
+        if isinstance(vector, SparseVector):
+            return vector.dimensions == self.dimensions
+        return isinstance(vector, np.ndarray) and vector.shape == (self.dimensions,)
+
+    def _to_storage(self, vector):
+        # Converts a dense array or SparseVector to this memory's layout and dtype
+        if self.layout == "sparse":
+            if isinstance(vector, SparseVector):
+                if (vector.values.dtype == self.dtype
+                        and vector.indices.dtype == SparseVector.index_dtype_for(self.dimensions)):
+                    return vector
+                return vector.astype(self.dtype)
+            return SparseVector.from_dense(vector, self.dtype)
+        if isinstance(vector, SparseVector):
+            return vector.toarray(self.dtype)
+        return vector.astype(self.dtype, copy=False)
+
+    def _digest(self, vector):
         if isinstance(vector, dict):
             vector = list(vector.values())
-        
-        # Convert the input vector to a string and hash it to create a deterministic seed
+
+        # Convert the input vector to a string and hash it to get its canonical digest
         vector_str = str(vector)
-        seed = int(hashlib.sha256(vector_str.encode()).hexdigest(), 16) % (2**32)
-        np.random.seed(seed)  # Seed the random number generator for deterministic behavior
-        
-        # Generate a deterministic hyperdimensional vector
-        hd_vector = sparse_random(1, self.dimensions, density=0.1, format='csr', random_state=seed)
-        hd_vector = hd_vector / norm(hd_vector)
-        return hd_vector.toarray().flatten()
+        return hashlib.sha256(vector_str.encode()).digest()
+
+    def _to_hyperdimensional(self, vector):
+        return self._encode_digests([self._digest(vector)])[0]
+
+    def _encode_digests(self, digests):
+        # Serve what we can from the encoder cache, then generate all misses in one batch
+        results = [None] * len(digests)
+        missing = {}
+        for i, digest in enumerate(digests):
+            hd_vector = self.encoder_cache.get(self._cache_key(digest))
+            if hd_vector is None:
+                missing.setdefault(digest, []).append(i)
+            else:
+                results[i] = hd_vector
+        if not missing:
+            return results
+
+        if self.encode_workers > 1 and len(missing) > 1:
+            # Seeds are per call, so misses can be generated on several threads
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.encode_workers)
+            generated = list(self._executor.map(self._generate, missing))
+        else:
+            generated = [self._generate(digest) for digest in missing]
+        generated = self._to_storage_many(generated)
+        for (digest, positions), hd_vector in zip(missing.items(), generated):
+            # Cached vectors are shared between callers, so they must not be mutated
+            if isinstance(hd_vector, SparseVector):
+                hd_vector.indices.flags.writeable = False
+                hd_vector.values.flags.writeable = False
+            else:
+                hd_vector.flags.writeable = False
+            self.encoder_cache.put(self._cache_key(digest), hd_vector)
+            for i in positions:
+                results[i] = hd_vector
+        return results
+
+    def _cache_key(self, digest):
+        return (digest, self.dimensions, self.density, self.layout, self.dtype.str, self.encoder.mode)
+
+    def _to_storage_many(self, vectors):
+        # Each vector gets an array of its own: rows of one batch matrix would
+        # keep the whole matrix alive while any of them is stored or cached.
+        # Densifying row by row costs about the same as one batched scatter
+        return [self._to_storage(vector) for vector in vectors]
+
+    def _generate(self, digest):
+        # Generate a deterministic hyperdimensional vector as its nonzeros only
+        return self.encoder.encode(digest)
+
+    def get_cache_stats(self):
+        return self.encoder_cache.get_stats()
 
     def apply_noise_reduction(self, vector):
         # Example noise reduction technique
         return vector * 0.9  # Reduce noise by scaling
 
     def adaptive_compress(self, vector):
-        # Example compression technique
-        return vector[:self.dimensions // 2]  # Compress to half the dimensions
+        # Compress to packed sign bits, one bit per dimension (or per code_bit)
+        quantizer = self.quantizer or BinaryQuantizer(self.dimensions)
+        return quantizer.quantize(vector)
 
 # Self-execute section for testing
 if __name__ == "__main__":
+    import tempfile
+
+    # Keep the test entries out of the tracked data/memory.db
+    db_path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
     # Test the HolographicMemory
-    memory = HolographicMemory()
+    memory = HolographicMemory(db_path=db_path)
     memory.dynamic_encode({"input": "test"}, {"output": "result"})
-    print("Retrieved memory:", memory.retrieve({"input": "test"}))
\ No newline at end of file
+    print("Retrieved memory:", memory.retrieve({"input": "test"}))
+    print("Encoder cache stats:", memory.get_cache_stats())
+    memory.flush()
+    print("Persistence stats:", memory.persistence_stats())
+
+    # Test a warm start from the entries persisted under an entity id
+    named_memory = HolographicMemory(db_path=db_path, entity_id="self_test")
+    named_memory.dynamic_encode({"input": "test"}, {"output": "result"})
+    named_memory.flush()
+    warm_memory = HolographicMemory(db_path=db_path, entity_id="self_test", warm_start="lazy")
+    print("Warm-started memory:", warm_memory.retrieve({"input": "test"}) is not None)
+    print("Unnamed memory shares nothing:", HolographicMemory(db_path=db_path).retrieve({"input": "test"}) is None)
+
+    # Test the compact sparse float32 layout
+    sparse_memory = HolographicMemory(db_path=db_path, layout="sparse", dtype=np.float32)
+    sparse_memory.dynamic_encode({"input": "test"}, {"output": "result"})
+    print("Retrieved sparse memory:", sparse_memory.retrieve({"input": "test"}))
+    print("Dense memory usage:", memory.memory_usage())
+
+    # Test the batched API
+    memory.encode_many([({"input": i}, {"output": i * i}) for i in range(100)])
+    batch = memory.retrieve_many([{"input": i} for i in range(100)])
+    print("Batch retrieved:", sum(vector is not None for vector in batch), "of", len(batch))
+
+    # Test similarity search with a noisy copy of a stored input vector
+    similar_memory = HolographicMemory(db_path=db_path, similarity_index=True, warm_start=None)
+    similar_memory.encode_many([({"input": i}, {"output": i}) for i in range(100)])
+    noisy = similar_memory._to_hyperdimensional({"input": 42}) + np.random.normal(0, 0.005, similar_memory.dimensions)
+    for key, score, _ in similar_memory.retrieve_similar(noisy, k=3):
+        print(f"Similar entry {key.hex()[:12]}: {score:.3f}")
+
+    # Compare the footprint of a fixed-size trace with the dict-based index.
+    # Without a codebook the trace never grows but only returns noisy vectors;
+    # the codebook adds one sparse row per distinct value for exact recall
+    pairs = [({"input": i}, {"output": f"result {i}"}) for i in range(200)]
+    trace_memory = HolographicMemory(db_path=db_path, mode="trace", trace_codebook=False, entity_id="trace_test", warm_start=None)
+    trace_memory.encode_many(pairs)
+    print("Codebook-free trace memory usage:", trace_memory.memory_usage())
+    print("Index memory usage:", similar_memory.memory_usage())
+    codebook_memory = HolographicMemory(db_path=db_path, mode="trace", entity_id="codebook_test", warm_start=None)
+    codebook_memory.encode_many(pairs)
+    print("Trace recall:", codebook_memory.measure_recall(pairs))
+    print("Trace stats:", codebook_memory.trace_stats())
+    print("Codebook trace memory usage:", codebook_memory.memory_usage())
+
+    # Compare binary sign codes, re-ranked at full precision, with float32 rows
+    binary_memory = HolographicMemory(db_path=db_path, similarity_index=True, similarity_codes="binary", warm_start=None)
+    binary_memory.encode_many([({"input": i}, {"output": i}) for i in range(100)])
+    for key, score, _ in binary_memory.retrieve_similar(noisy, k=3):
+        print(f"Binary similar entry {key.hex()[:12]}: {score:.3f}")
+    print("Binary index memory usage:", binary_memory.memory_usage())
+    print("Sparse memory usage:", sparse_memory.memory_usage())
+    # Test a capacity-bounded memory that spills evicted entries to SQLite
+    bounded_memory = HolographicMemory(db_path=db_path, entity_id="bounded_test", warm_start=None, max_entries=50, eviction="lfu")
+    bounded_memory.encode_many([({"input": i}, {"output": i}) for i in range(200)])
+    bounded = bounded_memory.retrieve_many([{"input": i} for i in range(200)])
+    print("Bounded retrieved:", sum(vector is not None for vector in bounded), "of", len(bounded))
+    print("Capacity stats:", bounded_memory.capacity_stats())
+
+    # Test incremental sharing: only entries changed after a revision are returned
+    entries, revision = bounded_memory.entries_since(0)
+    bounded_memory.encode_many([({"input": i}, {"output": i + 1}) for i in range(5)])
+    changed, revision = bounded_memory.entries_since(revision)
+    print("Entries since start:", len(entries), "changed since then:", len(changed))
\ No newline at end of file
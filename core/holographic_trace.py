@@ -0,0 +1,194 @@
+import hashlib
+import math
+import os
+import sys
+import numpy as np
+
+def get_root_dir():
+    """
+    Gets the absolute path to the root directory of the project.
+
+    Returns:
+        str: The absolute path to the root directory.
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_root_to_path():
+    """
+    Adds the root directory to the Python path.
+    """
+    root_dir = get_root_dir()
+    sys.path.insert(0, root_dir)
+
+add_root_to_path()
+
+from core.vector_store import SparseRowIndex, SparseVector
+
+# Number of associations bound per FFT batch, which bounds temporary memory
+BIND_BATCH_SIZE = 256
+
+class HolographicTrace:
+    """
+    A fixed-size superposition memory. Each key/value pair of hyperdimensional
+    vectors is bound with FFT-based circular convolution and bundled (summed)
+    into one of a few trace vectors, so the traces never grow with the number
+    of associations. Recall unbinds with circular correlation and cleans the
+    noisy result up against an optional codebook of known values. Only the
+    codebook grows, by one sparse row per distinct value.
+    """
+    def __init__(self, dimensions, traces=1, codebook=True, cleanup_threshold=0.5, dtype=np.float64):
+        self.dimensions = dimensions
+        self.traces = np.zeros((traces, dimensions))
+        self.loads = np.zeros(traces, dtype=np.int64)
+        self.cleanup_threshold = cleanup_threshold
+
+        # The codebook holds each distinct value once, as the nonzeros of its
+        # original vector. Cleanup scores against the centered value, which
+        # follows from the raw dot product, the value mean and its centered norm
+        self.use_codebook = codebook
+        self.codebook_ids = {}
+        self.codebook = SparseRowIndex(dimensions, dtype)
+        self.codebook_means = np.zeros(0)
+        self.codebook_norms = np.zeros(0)
+        self._codebook_rows = 0
+
+        self.stats = {"retrievals": 0, "recalled": 0, "score_total": 0.0}
+
+    def _trace_index(self, key):
+        return int.from_bytes(key[:8], "big") % len(self.traces)
+
+    def _centered(self, vectors):
+        # Binding only works well with zero-mean vectors, so remove the DC
+        # component of the (nonnegative) encoder output and renormalize
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        vectors = vectors - vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def bind_many(self, keys, key_vectors, values, value_vectors):
+        """
+        Binds each key vector to its value vector and adds the result to the
+        trace selected by the key digest. values are the original vectors kept
+        by the codebook, dense or SparseVector; value_vectors are their dense forms.
+        """
+        for start in range(0, len(keys), BIND_BATCH_SIZE):
+            stop = start + BIND_BATCH_SIZE
+            dense_values = self._centered(value_vectors[start:stop])
+            bound = np.fft.irfft(
+                np.fft.rfft(self._centered(key_vectors[start:stop]), axis=1)
+                * np.fft.rfft(dense_values, axis=1),
+                n=self.dimensions,
+                axis=1,
+            )
+            indices = np.array([self._trace_index(key) for key in keys[start:stop]])
+            np.add.at(self.traces, indices, bound)
+            np.add.at(self.loads, indices, 1)
+            if self.use_codebook:
+                for value in values[start:stop]:
+                    self._add_to_codebook(value)
+
+    def _add_to_codebook(self, value):
+        value_id = self._value_id(value)
+        if value_id in self.codebook_ids:
+            return
+        if not isinstance(value, SparseVector):
+            value = SparseVector.from_dense(np.asarray(value), self.codebook.dtype)
+        row = self._codebook_rows
+        if row == len(self.codebook_means):
+            capacity = max(16, 2 * row)
+            self.codebook_means = np.resize(self.codebook_means, capacity)
+            self.codebook_norms = np.resize(self.codebook_norms, capacity)
+        values = value.values.astype(np.float64)
+        mean = values.sum() / self.dimensions
+        # |v - mean|^2 = |v|^2 - dimensions * mean^2
+        norm = math.sqrt(max(values @ values - self.dimensions * mean * mean, 0.0))
+        self.codebook.add(row, value)
+        self.codebook_means[row] = mean
+        self.codebook_norms[row] = norm or 1.0
+        self.codebook_ids[value_id] = row
+        self._codebook_rows += 1
+
+    def _value_id(self, value):
+        if hasattr(value, "indices"):
+            return hashlib.sha256(value.indices.tobytes() + value.values.tobytes()).digest()
+        return hashlib.sha256(np.ascontiguousarray(value).tobytes()).digest()
+
+    def unbind(self, key, key_vector):
+        """
+        Returns the noisy (centered) value vector bound to a key.
+        """
+        trace = self.traces[self._trace_index(key)]
+        return np.fft.irfft(
+            np.fft.rfft(trace) * np.conj(np.fft.rfft(self._centered(key_vector)[0])),
+            n=self.dimensions,
+        )
+
+    def recall(self, key, key_vector):
+        """
+        Unbinds a key and cleans the result up against the codebook. Returns the
+        original value vector as a SparseVector, or None when no codebook entry
+        scores above the cleanup threshold. Without a codebook the noisy vector
+        is returned.
+        """
+        noisy = self.unbind(key, key_vector)
+        self.stats["retrievals"] += 1
+        if not self.use_codebook:
+            return noisy
+        if self._codebook_rows == 0:
+            return None
+        rows, dots = self.codebook.scores(noisy)
+        scores = (dots - self.codebook_means[rows] * noisy.sum()) / self.codebook_norms[rows]
+        best = int(np.argmax(scores))
+        # Keys and values are unit length, so a correct match scores about 1.0
+        # while crosstalk scores are roughly N(0, sqrt(load / dimensions))
+        score = float(scores[best])
+        self.stats["score_total"] += score
+        if score < self.cleanup_threshold:
+            return None
+        self.stats["recalled"] += 1
+        return self.codebook.get(int(rows[best]))
+
+    def estimated_capacity(self, target_recall=0.99):
+        """
+        Estimates how many associations each trace can hold while cleanup still
+        picks the right codebook entry with the target probability. Crosstalk
+        noise grows as sqrt(load / dimensions), giving the usual HRR bound of
+        dimensions / (2 ln(codebook size / error rate)).
+        """
+        codebook_size = max(self._codebook_rows, 2)
+        return int(self.dimensions / (2 * math.log(codebook_size / (1 - target_recall))))
+
+    def get_stats(self):
+        retrievals = self.stats["retrievals"]
+        return {
+            "associations": int(self.loads.sum()),
+            "traces": len(self.traces),
+            "max_trace_load": int(self.loads.max()),
+            "estimated_capacity_per_trace": self.estimated_capacity(),
+            "codebook_size": self._codebook_rows,
+            "retrievals": retrievals,
+            "recall_rate": self.stats["recalled"] / retrievals if retrievals else 0.0,
+            "mean_cleanup_score": self.stats["score_total"] / retrievals if retrievals else 0.0,
+        }
+
+    def memory_usage(self):
+        codebook_bytes = self.codebook.nbytes + self.codebook_means.nbytes + self.codebook_norms.nbytes
+        return {"trace_bytes": self.traces.nbytes + self.loads.nbytes, "codebook_bytes": codebook_bytes}
+
+# Self-execute section for testing
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    dimensions = 4096
+    trace = HolographicTrace(dimensions)
+    keys = [bytes([i]) * 32 for i in range(100)]
+    key_vectors = rng.random((100, dimensions))
+    value_vectors = rng.random((100, dimensions))
+    trace.bind_many(keys, key_vectors, list(value_vectors), value_vectors)
+    correct = 0
+    for key, key_vector, value in zip(keys, key_vectors, value_vectors):
+        recalled = trace.recall(key, key_vector)
+        correct += recalled is not None and np.array_equal(recalled.toarray(), value)
+    print(f"Recalled {correct} of {len(keys)} associations.")
+    print("Trace stats:", trace.get_stats())
+    print("Trace memory usage:", trace.memory_usage())
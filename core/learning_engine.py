@@ -35,7 +35,7 @@ class LearningEngine:
                 print(f"New learning rate for {domain}: {self.learning_rate}")
                 
                 # Persist learning rate adjustment in memory
-                memory = HolographicMemory()
+                memory = HolographicMemory(entity_id="learning_engine")
                 memory.dynamic_encode({"domain": domain, "type": "learning_rate"}, self.learning_rate)
             else:
                 print(f"Task in {domain} completed successfully. No optimization needed.")
@@ -1,5 +1,11 @@
+import asyncio
+import inspect
 import os
 import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 def get_root_dir():
     """
@@ -27,40 +33,292 @@ from domains.english_module import EmergentEnglishEntity
 from domains.python_module import EmergentPythonEntity
 from domains.science_module import EmergentScienceEntity
 
+# Ways distribute_tasks can run the tasks of one meta-task: one after another,
+# on a thread pool, or on a thread pool with domain modules in a process pool
+EXECUTORS = (None, "thread", "process")
+
+def _interact_in_process(module, method, payload):
+    # Runs in a worker process; the module's internal_state is sent back with the result
+    return getattr(module, method)(payload), module.internal_state
+
+class ProcessDomainModule:
+    """
+    Runs a domain module in a process pool, so CPU-heavy tasks do not hold the
+    GIL of the main process. The module's internal_state is copied back after
+    each call and other attributes are read from the wrapped module.
+    """
+    def __init__(self, module, pool):
+        self.module = module
+        self.pool = pool
+        # Without an interact_batch of the module's own, EmergentEntityCore
+        # falls back to one interact call per task
+        if hasattr(module, "interact_batch"):
+            self.interact_batch = self._interact_batch
+
+    def interact(self, task_input):
+        return self._call("interact", task_input)
+
+    def _interact_batch(self, task_inputs):
+        return self._call("interact_batch", task_inputs)
+
+    def _call(self, method, payload):
+        result, self.module.internal_state = self.pool.submit(_interact_in_process, self.module, method, payload).result()
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
 class EmergentMetaEntity:
     """
     A meta-entity system that dynamically manages and evolves a collection of emergent entities.
     """
-    def __init__(self, entities, db_manager):
+    def __init__(self, entities, db_manager, recorder=None, executor=None, max_workers=None,
+                 task_timeout=None, process_domains=None):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unsupported executor: {executor}")
         self.components = {
             "entities": entities,
             "db_manager": db_manager,
+            # Optional LatencyRecorder timing each task and database write
+            "recorder": recorder,
         }
         self.state = {
             "task_history": [],
         }
 
+        # With an executor the domains of a meta-task run concurrently, and a
+        # task that takes longer than task_timeout seconds gets an error result.
+        # The "process" executor runs the domain modules of process_domains
+        # (all domains by default) in a process pool
+        self.executor = executor
+        self.max_workers = max_workers
+        self.task_timeout = task_timeout
+        self.process_domains = process_domains
+        self._thread_pool = None
+        self._process_pool = None
+
+        # A timed-out task cannot be stopped, so its entity stays busy until
+        # the task returns. Busy entities are skipped rather than given a
+        # second, concurrent interact call on the same state
+        self._busy = set()
+        self._busy_lock = threading.Lock()
+        for entity in entities:
+            self._attach(entity)
+
+    def _attach(self, entity):
+        if self.executor != "process":
+            return
+        if self.process_domains is not None and entity.state["domain_name"] not in self.process_domains:
+            return
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        module = entity.components["domain_module"]
+        if not isinstance(module, ProcessDomainModule):
+            entity.components["domain_module"] = ProcessDomainModule(module, self._process_pool)
+
+    def _pool(self):
+        if self._thread_pool is None:
+            workers = self.max_workers or max(len(self.components["entities"]), 1)
+            self._thread_pool = ThreadPoolExecutor(max_workers=workers)
+        return self._thread_pool
+
+    def close(self):
+        """
+        Shuts down the thread and process pools. Tasks that timed out are not waited for.
+        """
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = None
+        self._process_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def distribute_tasks(self, meta_task):
         """
         Distributes tasks to individual entities based on their domain and collects results.
         """
-        results = {}
+        results, pending_rows = self._run_tasks(meta_task)
+
+        # Store them with one transaction per database
+        self._store_rows(pending_rows)
+        return results
+
+    def distribute_task_batches(self, meta_tasks):
+        """
+        Like distribute_tasks, for a list of tasks per domain. Each entity
+        processes its list with interact_batch, and the results come back as
+        a list per domain in task order.
+        """
+        results, pending_rows = self._run_tasks(meta_tasks, batches=True)
+        self._store_rows(pending_rows)
+        return results
+
+    async def distribute_tasks_async(self, meta_task):
+        """
+        Like distribute_tasks, for entities whose db_manager is an AsyncDBManager:
+        the rows are queued for its writer thread instead of blocking the event loop.
+        Rows for a plain DBManager are written on the loop's default executor.
+        With an executor the tasks are awaited as well; without one they still
+        run inline, one after another.
+        """
+        calls = self._task_calls(meta_task)
+        if self.executor is None:
+            outcomes = [(True, self._interact(entity, task_data)) for entity, task_data in calls]
+        else:
+            futures = self._submit(calls)
+            running = [asyncio.wrap_future(future) for future in futures if isinstance(future, Future)]
+            if running:
+                # Unlike wait_for, wait() leaves unfinished tasks running
+                await asyncio.wait(running, timeout=self.task_timeout)
+            outcomes = []
+            for (entity, task_data), future in zip(calls, futures):
+                if not isinstance(future, Future):
+                    outcomes.append(future)
+                elif future.done():
+                    outcomes.append((True, future.result()))
+                else:
+                    outcomes.append(self._timed_out(entity, task_data, future))
+        results, pending_rows = self._collect(calls, outcomes)
+        loop = asyncio.get_running_loop()
+        for db_manager, rows, _ in pending_rows.values():
+            if inspect.iscoroutinefunction(db_manager.insert_many):
+                await db_manager.insert_many(rows)
+            else:
+                await loop.run_in_executor(None, db_manager.insert_many, rows)
+        return results
+
+    def _run_tasks(self, meta_task, batches=False):
+        calls = self._task_calls(meta_task, batches)
+        if self.executor is None:
+            outcomes = [(True, self._interact(entity, task_data, batches)) for entity, task_data in calls]
+        else:
+            # Every domain starts at once; results are still gathered in
+            # entity order, so results and task_history do not depend on timing
+            futures = self._submit(calls, batches)
+            deadline = None if self.task_timeout is None else time.monotonic() + self.task_timeout
+            outcomes = []
+            for (entity, task_data), future in zip(calls, futures):
+                if not isinstance(future, Future):
+                    outcomes.append(future)
+                    continue
+                try:
+                    timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                    outcomes.append((True, future.result(timeout=timeout)))
+                except FutureTimeoutError:
+                    outcomes.append(self._timed_out(entity, task_data, future, batches))
+        return self._collect(calls, outcomes, batches)
+
+    def _task_calls(self, meta_task, batches=False):
+        calls = []
         for entity in self.components["entities"]:
             domain = entity.state["domain_name"]
             task_data = meta_task.get(domain)
-            if task_data is not None:
+            if batches and task_data:
+                print(f"Processing {domain} domain with {len(task_data)} tasks.")
+                calls.append((entity, list(task_data)))
+            elif not batches and task_data is not None:
                 print(f"Processing {domain} domain with task: {task_data}")
-                task_result = entity.interact(task_data)
-                results[domain] = task_result
-
-                # Store task data and result in the database
-                entity.components["db_manager"].insert_data(str(task_data), str(task_result))
+                calls.append((entity, task_data))
             else:
                 print(f"No task data provided for {domain} domain.")
+        return calls
+
+    def _submit(self, calls, batches=False):
+        # Returns a future per call, or a failed outcome for an entity that is
+        # still busy with a task that timed out earlier
+        futures = []
+        for entity, task_data in calls:
+            with self._busy_lock:
+                busy = id(entity) in self._busy
+            if busy:
+                message = f"Error: {entity.state['domain_name']} is still running a task that timed out."
+                futures.append((False, [message] * len(task_data) if batches else message))
+            else:
+                futures.append(self._pool().submit(self._interact, entity, task_data, batches))
+        return futures
+
+    def _timed_out(self, entity, task_data, future, batches=False):
+        key = id(entity)
+        with self._busy_lock:
+            self._busy.add(key)
+        # Runs at once if the task has finished in the meantime
+        future.add_done_callback(lambda _: self._release(key))
+        message = f"Error: {entity.state['domain_name']} task timed out after {self.task_timeout} s."
+        return False, [message] * len(task_data) if batches else message
+
+    def _release(self, key):
+        with self._busy_lock:
+            self._busy.discard(key)
+
+    def _collect(self, calls, outcomes, batches=False):
+        results = {}
+        pending_rows = {}
+        for (entity, task_data), (completed, task_result) in zip(calls, outcomes):
+            results[entity.state["domain_name"]] = task_result
+            if not completed:
+                # A timed-out or skipped task may still finish, so no result is stored for it
+                continue
+
+            # Collect task data and results per database, with the entities
+            # whose rows each write carries
+            db_manager = entity.components["db_manager"]
+            _, rows, sources = pending_rows.setdefault(id(db_manager), (db_manager, [], []))
+            sources.append((entity.state["entity_id"], entity.state["domain_name"], self._task_type(task_data, batches)))
+            if batches:
+                rows.extend((str(task), str(output)) for task, output in zip(task_data, task_result))
+            else:
+                rows.append((str(task_data), str(task_result)))
 
         # Update the meta-entity state
         self.state["task_history"].append(results)
-        return results
+        return results, pending_rows
+
+    def _interact(self, entity, task_data, batches=False):
+        recorder = self.components["recorder"]
+        if recorder is None or not recorder.enabled:
+            return entity.interact_batch(task_data) if batches else entity.interact(task_data)
+        start = time.perf_counter()
+        task_result = entity.interact_batch(task_data) if batches else entity.interact(task_data)
+        recorder.record(entity.state["entity_id"], entity.state["domain_name"], self._task_type(task_data, batches),
+                        "interact", time.perf_counter() - start)
+        return task_result
+
+    @staticmethod
+    def _task_type(task_data, batches=False):
+        if batches:
+            return "batch"
+        return str(task_data.get("type", "unknown")) if isinstance(task_data, dict) else "unknown"
+
+    def _store_rows(self, pending_rows):
+        # Databases are independent, so with an executor they are written concurrently
+        if self.executor is None:
+            for db_manager, rows, sources in pending_rows.values():
+                self._insert(db_manager, rows, sources)
+        else:
+            futures = [
+                self._pool().submit(self._insert, db_manager, rows, sources)
+                for db_manager, rows, sources in pending_rows.values()
+            ]
+            for future in futures:
+                future.result()
+
+    def _insert(self, db_manager, rows, sources):
+        recorder = self.components["recorder"]
+        if recorder is None or not recorder.enabled:
+            db_manager.insert_many(rows)
+            return
+        start = time.perf_counter()
+        db_manager.insert_many(rows)
+        elapsed = time.perf_counter() - start
+        # Entities sharing a database share its transaction, so each of them
+        # is charged the latency of the whole write
+        for entity_id, domain, task_type in sources:
+            recorder.record(entity_id, domain, task_type, "db_insert", elapsed)
 
     def evolve_system(self, task_results):
         """
@@ -88,7 +346,9 @@ class EmergentMetaEntity:
         """
         Dynamically creates a new emergent entity for a specific domain.
         """
-        memory = HolographicMemory()
+        # The new entity writes its memory entries under its own id
+        entity_id = EmergentEntityCore.new_entity_id(domain)
+        memory = HolographicMemory(entity_id=entity_id)
         db = DBManager(f"{domain}.db")
         if domain == "math":
             module = EmergentMathEntity()  # No memory argument needed
@@ -101,7 +361,8 @@ class EmergentMetaEntity:
         else:
             raise ValueError(f"Unsupported domain: {domain}")
 
-        new_entity = EmergentEntityCore(module, db, memory)
+        new_entity = EmergentEntityCore(module, db, memory, entity_id=entity_id)
+        self._attach(new_entity)
         self.components["entities"].append(new_entity)
         print(f"Created new entity for {domain} domain.")
         return new_entity
@@ -138,10 +399,10 @@ if __name__ == "__main__":
     db_manager = DBManager("global.db")
 
     # Create initial entities
-    math_entity = EmergentEntityCore(math_module, db_manager, HolographicMemory())
-    english_entity = EmergentEntityCore(english_module, db_manager, HolographicMemory())
-    python_entity = EmergentEntityCore(python_module, db_manager, HolographicMemory())
-    science_entity = EmergentEntityCore(science_module, db_manager, HolographicMemory())
+    math_entity = EmergentEntityCore(math_module, db_manager, HolographicMemory(entity_id="math"), entity_id="math")
+    english_entity = EmergentEntityCore(english_module, db_manager, HolographicMemory(entity_id="english"), entity_id="english")
+    python_entity = EmergentEntityCore(python_module, db_manager, HolographicMemory(entity_id="python"), entity_id="python")
+    science_entity = EmergentEntityCore(science_module, db_manager, HolographicMemory(entity_id="science"), entity_id="science")
 
     # Initialize the meta-entity system
     meta_entity = EmergentMetaEntity(
@@ -159,4 +420,22 @@ if __name__ == "__main__":
 
     # Distribute tasks and evolve the system
     results = meta_entity.distribute_tasks(meta_tasks)
-    meta_entity.evolve_system(results)
\ No newline at end of file
+    meta_entity.evolve_system(results)
+
+    # Distribute several tasks per domain in one batch
+    batch_results = meta_entity.distribute_task_batches({
+        "math": [{"type": "addition", "a": 1, "b": 2}, {"type": "division", "a": 1, "b": 0}],
+        "science": [{"type": "physics", "question": "What is mass?", "answer": "A measure of inertia."}],
+    })
+    print("Batch results:", batch_results)
+
+    # Run the domains of a meta-task concurrently on a thread pool, timing
+    # each task and write under the entity that ran it
+    from core.instrumentation import LatencyRecorder
+    recorder = LatencyRecorder()
+    with EmergentMetaEntity(meta_entity.components["entities"][:4], db_manager, recorder=recorder,
+                            executor="thread", task_timeout=10) as parallel_meta:
+        print("Parallel results:", parallel_meta.distribute_tasks(meta_tasks))
+    # A plain DBManager also works from a coroutine; its write runs off the loop
+    print("Async results:", asyncio.run(meta_entity.distribute_tasks_async({"math": {"type": "addition", "a": 2, "b": 2}})))
+    print("Recorded math stages:", sorted(recorder.snapshot()["math"]["math"]["addition"]))
\ No newline at end of file
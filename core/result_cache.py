@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+def get_root_dir():
+    """
+    Gets the absolute path to the root directory of the project.
+
+    Returns:
+        str: The absolute path to the root directory.
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_root_to_path():
+    """
+    Adds the root directory to the Python path.
+    """
+    root_dir = get_root_dir()
+    sys.path.insert(0, root_dir)
+
+add_root_to_path()
+
+from core.db_manager import content_hash
+
+# Task types whose result depends only on the task itself, per domain. Python
+# "evaluate" runs arbitrary code, which may depend on time or state, so it is
+# never cached.
+CACHEABLE_TASK_TYPES = {
+    "math": {"addition", "subtraction", "multiplication", "division"},
+    "english": {"vocabulary", "grammar"},
+    "python": {"debug", "function"},
+    "science": {"biology", "chemistry", "physics", "astronomy"},
+}
+
+# Results kept in the in-process LRU by default
+DEFAULT_RESULT_CACHE_SIZE = 4096
+
+class ResultCache:
+    """
+    Caches task results so repeated deterministic tasks skip the domain module.
+    Lookups go to an in-process LRU first and then to the knowledge table of
+    the DBManager, through its indexed content_hash column. Only task types
+    listed in the policy for the domain are cached.
+    """
+    def __init__(self, db_manager=None, max_entries=DEFAULT_RESULT_CACHE_SIZE, policy=None):
+        self.db_manager = db_manager
+        self.max_entries = max_entries
+        self.policy = CACHEABLE_TASK_TYPES if policy is None else policy
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "uncacheable": 0, "evictions": 0}
+
+    def is_cacheable(self, domain, task_data):
+        if not isinstance(task_data, dict):
+            return False
+        return task_data.get("type") in self.policy.get(domain, ())
+
+    def get(self, domain, task_data):
+        """
+        Returns the cached result of a task, or None on a miss or for
+        task types that are not cacheable.
+        """
+        if not self.is_cacheable(domain, task_data):
+            with self._lock:
+                self.stats["uncacheable"] += 1
+            return None
+        input_data = str(task_data)
+        key = (domain, content_hash(input_data))
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return result
+
+        result = None
+        if self.db_manager is not None:
+            result = self.db_manager.lookup_output(input_data)
+        with self._lock:
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["db_hits"] += 1
+        self._store(key, result)
+        return result
+
+    def put(self, domain, task_data, result):
+        if self.is_cacheable(domain, task_data):
+            self._store((domain, content_hash(str(task_data))), result)
+
+    def _store(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_stats(self):
+        """
+        Returns hit, miss and size counters. hit_rate covers cacheable lookups only.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        hits = stats["memory_hits"] + stats["db_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Self-execute section for testing
+if __name__ == "__main__":
+    from core.db_manager import DBManager
+
+    with DBManager("test.db") as db_manager:
+        db_manager.insert_data(str({"type": "addition", "a": 1, "b": 2}), "EmergentMathEntity result: 3")
+        cache = ResultCache(db_manager)
+        print("From the database:", cache.get("math", {"type": "addition", "a": 1, "b": 2}))
+        print("From the LRU:", cache.get("math", {"type": "addition", "a": 1, "b": 2}))
+        print("Uncacheable:", cache.get("python", {"type": "evaluate", "code": "print(1)"}))
+        print("Result cache stats:", cache.get_stats())
\ No newline at end of file
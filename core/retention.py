@@ -0,0 +1,328 @@
+import gzip
+import json
+import os
+import sqlite3
+import time
+import uuid
+import numpy as np
+
+# Columns that identify one logical entry per table, used by keep_latest_per_key
+TABLE_KEYS = {
+    "knowledge": ("domain", "content_hash"),
+    "memory_entries": ("entity_id", "input_key"),
+}
+
+# Rows archived and deleted per transaction. Small batches keep each write
+# lock short, so DBManager and HolographicMemory writers only wait briefly.
+PRUNE_BATCH_SIZE = 500
+
+# Free pages released per incremental_vacuum step
+VACUUM_STEP_PAGES = 256
+
+class RetentionPolicy:
+    """
+    Which rows of a table to keep. Rows older than max_age_days, rows beyond
+    the max_rows most recently seen (last_seen, else timestamp), and (with keep_latest_per_key) every row that a
+    newer row with the same key supersedes are pruned.
+    """
+    def __init__(self, max_age_days=None, max_rows=None, keep_latest_per_key=False):
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self.keep_latest_per_key = keep_latest_per_key
+
+    def __repr__(self):
+        return (f"RetentionPolicy(max_age_days={self.max_age_days}, max_rows={self.max_rows}, "
+                f"keep_latest_per_key={self.keep_latest_per_key})")
+
+class RetentionManager:
+    """
+    Applies retention policies to the tables of one SQLite file. Pruned rows
+    are archived first: knowledge rows to gzip-compressed NDJSON, and
+    memory_entries (which hold vector blobs) to NPZ segments. Both can be
+    re-imported with import_segment(). Work is done in short transactions
+    over a WAL connection, so it can run while the database is in use.
+    """
+    def __init__(self, db_path, archive_dir=None):
+        self.db_path = db_path
+        self.archive_dir = archive_dir or default_archive_dir(db_path)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _table_exists(self, table):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+
+    def prunable_ids(self, table, policy):
+        """
+        Returns the sorted ids of the rows a policy would prune.
+        """
+        ids = set()
+        # Upserted rows keep their first timestamp; last_seen is refreshed
+        # every time the entry is written again
+        columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        age_column = "COALESCE(last_seen, timestamp)" if "last_seen" in columns else "timestamp"
+        if policy.max_age_days is not None:
+            ids.update(row[0] for row in self.conn.execute(
+                f"SELECT id FROM {table} WHERE {age_column} < datetime('now', ?)",
+                (f"-{policy.max_age_days} days",),
+            ))
+        if policy.max_rows is not None:
+            # The most recently seen rows are kept, so an old row that was
+            # upserted again outranks newer rows that were never touched
+            ids.update(row[0] for row in self.conn.execute(
+                f"SELECT id FROM {table} ORDER BY {age_column} DESC, id DESC LIMIT -1 OFFSET ?",
+                (policy.max_rows,),
+            ))
+        if policy.keep_latest_per_key:
+            key_columns = ", ".join(TABLE_KEYS[table])
+            last_key = TABLE_KEYS[table][-1]
+            ids.update(row[0] for row in self.conn.execute(
+                f"""
+                SELECT id FROM {table}
+                WHERE {last_key} IS NOT NULL AND id NOT IN (
+                    SELECT MAX(id) FROM {table} WHERE {last_key} IS NOT NULL GROUP BY {key_columns}
+                )
+                """
+            ))
+        return sorted(ids)
+
+    def prune(self, table, policy, archive=True):
+        """
+        Archives and deletes the rows a policy prunes. Returns the number of
+        rows pruned and the segment files written.
+        """
+        if not self._table_exists(table):
+            return 0, []
+        ids = self.prunable_ids(table, policy)
+        run = new_run_name()
+        segments = []
+        for start in range(0, len(ids), PRUNE_BATCH_SIZE):
+            batch = ids[start:start + PRUNE_BATCH_SIZE]
+            with self.conn:
+                if archive:
+                    # A row may be archived twice if a run dies between the
+                    # archive write and the commit; import_segment ignores repeats
+                    path = archive_rows(self.conn, self.db_path, table, batch, run, start // PRUNE_BATCH_SIZE, self.archive_dir)
+                    if path not in segments:
+                        segments.append(path)
+                placeholders = ", ".join("?" * len(batch))
+                self.conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", batch)
+        return len(ids), segments
+
+    def incremental_vacuum(self, step_pages=VACUUM_STEP_PAGES):
+        """
+        Returns freed pages to the file system in small steps. Needs
+        auto_vacuum=INCREMENTAL (see enable_incremental_vacuum); returns the
+        number of pages released, or None when it is not enabled.
+        """
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return None
+        initial_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        free_pages = initial_pages
+        while free_pages:
+            self.conn.execute(f"PRAGMA incremental_vacuum({step_pages})").fetchall()
+            remaining = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free_pages:
+                break
+            free_pages = remaining
+        return initial_pages - free_pages
+
+    def enable_incremental_vacuum(self):
+        """
+        Switches an existing file to auto_vacuum=INCREMENTAL. This rebuilds the
+        file with a full VACUUM, so run it once while the database is idle.
+        """
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("VACUUM")
+
+    def import_segment(self, path, table=None):
+        """
+        Re-imports an archived segment. Rows keep their ids, so rows that are
+        already present are skipped. Returns the number of rows inserted.
+        """
+        if table is None:
+            table = "memory_entries" if "_memory_entries_" in os.path.basename(path) else "knowledge"
+        if path.endswith(".npz"):
+            columns, rows = read_npz_segment(path)
+        else:
+            columns, rows = read_ndjson_segment(path)
+        if not rows:
+            return 0
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                rows,
+            )
+        return self.conn.total_changes - before
+
+def new_run_name():
+    """
+    Returns a unique, chronologically sortable name for an archive run: the
+    time to the microsecond, the process id and a random suffix, so runs in
+    the same second or in concurrent processes never share segment files.
+    """
+    now = time.time()
+    microseconds = int(now % 1 * 1_000_000)
+    return f"{time.strftime('%Y%m%d%H%M%S', time.localtime(now))}{microseconds:06d}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+def default_archive_dir(db_path):
+    return os.path.join(os.path.dirname(db_path), "archive")
+
+def archive_rows(conn, db_path, table, ids, run, part=0, archive_dir=None):
+    """
+    Writes the rows of a table with the given ids to an archive segment of a
+    run: memory_entries to one NPZ file per part, other tables appended to one
+    gzip-compressed NDJSON file. Returns the segment path.
+    """
+    archive_dir = archive_dir or default_archive_dir(db_path)
+    os.makedirs(archive_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    placeholders = ", ".join("?" * len(ids))
+    cursor = conn.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", ids)
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    if table == "memory_entries":
+        path = os.path.join(archive_dir, f"{stem}_{table}_{run}_{part:05d}.npz")
+        write_npz_segment(path, columns, rows)
+    else:
+        path = os.path.join(archive_dir, f"{stem}_{table}_{run}.ndjson.gz")
+        append_ndjson_segment(path, columns, rows)
+    return path
+
+def archive_merged_rows(cursor, db_path, table, ids):
+    """
+    Archives and deletes rows that a schema upgrade merged into a newer row
+    of the same key, inside the caller's transaction. Their segments use a
+    run name ending in "_merged" and can be restored with import_segment().
+    Returns the number of rows deleted.
+    """
+    run = new_run_name() + "_merged"
+    for start in range(0, len(ids), PRUNE_BATCH_SIZE):
+        batch = ids[start:start + PRUNE_BATCH_SIZE]
+        archive_rows(cursor, db_path, table, batch, run, start // PRUNE_BATCH_SIZE)
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+    return len(ids)
+
+def append_ndjson_segment(path, columns, rows):
+    # Appending creates a multi-member gzip file, which reads back as one stream
+    with gzip.open(path, "at", encoding="utf-8") as segment:
+        for row in rows:
+            segment.write(json.dumps(dict(zip(columns, row))) + "\n")
+
+def read_ndjson_segment(path):
+    columns, rows = None, []
+    with gzip.open(path, "rt", encoding="utf-8") as segment:
+        for line in segment:
+            record = json.loads(line)
+            if columns is None:
+                columns = list(record)
+            rows.append(tuple(record[column] for column in columns))
+    return columns or [], rows
+
+def write_npz_segment(path, columns, rows):
+    # Blob columns are stored as one byte array with offsets (length -1 marks
+    # NULL); the other columns as one JSON document per row. Nothing is pickled.
+    blob_columns = [
+        i for i, column in enumerate(columns)
+        if any(isinstance(row[i], bytes) for row in rows)
+    ]
+    arrays = {
+        "columns": np.array(columns),
+        "blob_columns": np.array(blob_columns, dtype=np.int64),
+        "rows": np.array([
+            json.dumps([value for i, value in enumerate(row) if i not in blob_columns])
+            for row in rows
+        ]),
+    }
+    for i in blob_columns:
+        values = [row[i] for row in rows]
+        arrays[f"blob_{i}_lengths"] = np.array([-1 if value is None else len(value) for value in values], dtype=np.int64)
+        arrays[f"blob_{i}_data"] = np.frombuffer(b"".join(value for value in values if value is not None), dtype=np.uint8)
+    # Exclusive creation refuses to overwrite an existing segment
+    with open(path, "xb") as segment:
+        np.savez_compressed(segment, **arrays)
+
+def read_npz_segment(path):
+    with np.load(path) as segment:
+        columns = [str(column) for column in segment["columns"]]
+        blob_columns = [int(i) for i in segment["blob_columns"]]
+        plain_rows = [json.loads(str(row)) for row in segment["rows"]]
+        blobs = {}
+        for i in blob_columns:
+            lengths = segment[f"blob_{i}_lengths"]
+            data = segment[f"blob_{i}_data"].tobytes()
+            values, offset = [], 0
+            for length in lengths:
+                if length < 0:
+                    values.append(None)
+                else:
+                    values.append(data[offset:offset + length])
+                    offset += length
+            blobs[i] = values
+    rows = []
+    for n, plain in enumerate(plain_rows):
+        plain = iter(plain)
+        rows.append(tuple(blobs[i][n] if i in blobs else next(plain) for i in range(len(columns))))
+    return columns, rows
+
+# Self-execute section for testing
+if __name__ == "__main__":
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "retention.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("""
+    CREATE TABLE knowledge (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, input_data TEXT, output_data TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, content_hash TEXT, domain TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE memory_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, entity_id TEXT NOT NULL, memory_type TEXT NOT NULL,
+        content TEXT NOT NULL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, input_key BLOB, vector BLOB
+    )
+    """)
+    conn.executemany(
+        "INSERT INTO knowledge (input_data, output_data, content_hash, domain) VALUES (?, ?, ?, 'math')",
+        [(f"task {i % 100}", f"result {i}", str(i % 100)) for i in range(1000)],
+    )
+    conn.executemany(
+        "INSERT INTO memory_entries (entity_id, memory_type, content, input_key, vector) VALUES ('e', 'dynamic_encode', '', ?, ?)",
+        [(bytes([i % 10]) * 32, np.full(1024, i, dtype=np.float32).tobytes()) for i in range(100)],
+    )
+    conn.commit()
+    conn.close()
+
+    with RetentionManager(db_path) as manager:
+        pruned, segments = manager.prune("knowledge", RetentionPolicy(keep_latest_per_key=True))
+        print(f"Pruned {pruned} knowledge rows into {len(segments)} segment(s).")
+        memory_pruned, memory_segments = manager.prune("memory_entries", RetentionPolicy(keep_latest_per_key=True))
+        print(f"Pruned {memory_pruned} memory entries into {len(memory_segments)} segment(s).")
+        print("Pages released by incremental vacuum:", manager.incremental_vacuum())
+        restored = sum(manager.import_segment(path) for path in segments + memory_segments)
+        print("Rows restored from the archive:", restored)
+        # A second run in the same second writes new segments beside the first
+        _, second_segments = manager.prune("memory_entries", RetentionPolicy(keep_latest_per_key=True))
+        # An old row seen again is kept ahead of newer rows by max_rows
+        manager.conn.execute("ALTER TABLE knowledge ADD COLUMN last_seen DATETIME")
+        oldest = manager.conn.execute("SELECT MIN(id) FROM knowledge").fetchone()[0]
+        manager.conn.execute("UPDATE knowledge SET last_seen = datetime('now', '+1 minute') WHERE id = ?", (oldest,))
+        print("Re-seen row kept by max_rows:", oldest not in manager.prunable_ids("knowledge", RetentionPolicy(max_rows=1)))
+        print("Second run kept the first segments:", not set(second_segments) & set(memory_segments)
+              and all(os.path.exists(path) for path in memory_segments + second_segments))
\ No newline at end of file
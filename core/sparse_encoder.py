@@ -0,0 +1,90 @@
+import os
+import sys
+import numpy as np
+
+def get_root_dir():
+    """
+    Gets the absolute path to the root directory of the project.
+
+    Returns:
+        str: The absolute path to the root directory.
+    """
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def add_root_to_path():
+    """
+    Adds the root directory to the Python path.
+    """
+    root_dir = get_root_dir()
+    sys.path.insert(0, root_dir)
+
+add_root_to_path()
+
+from core.vector_store import SparseVector
+
+# Encoding modes. "compat" reproduces the vectors of the original
+# scipy.sparse.random encoder bit for bit; "fast" draws the nonzeros from a
+# counter-based Philox stream keyed by the digest in O(nnz) time.
+ENCODER_MODES = ("compat", "fast")
+
+class SparseEncoder:
+    """
+    Encodes 32-byte digests as unit-length sparse hyperdimensional vectors
+    with a fixed number of nonzeros, producing only their indices and values.
+    Each call builds its own generator from the digest, so encoding is
+    deterministic and safe to run from several threads.
+    """
+    def __init__(self, dimensions, density=0.1, mode="compat"):
+        if mode not in ENCODER_MODES:
+            raise ValueError(f"Unsupported encoder mode: {mode}")
+        self.dimensions = dimensions
+        self.density = density
+        self.mode = mode
+        # Same rounding as scipy.sparse.random
+        self.nnz = int(round(density * dimensions))
+
+    def encode(self, digest):
+        if self.mode == "compat":
+            indices, values = self._compat(digest)
+        else:
+            indices, values = self._fast(digest)
+        # scipy.sparse.linalg.norm and sparse division compute exactly this
+        values = values * (1 / np.linalg.norm(values))
+        return SparseVector(indices, values, self.dimensions)
+
+    def _compat(self, digest):
+        # The draws scipy.sparse.random(1, dimensions, density, random_state=seed)
+        # makes: nnz positions without replacement, then nnz uniform values,
+        # reordered by position as the CSR conversion does. RandomState.choice
+        # still permutes every dimension, so this mode stays O(dimensions).
+        rng = np.random.RandomState(int.from_bytes(digest, "big") % (2**32))
+        indices = rng.choice(self.dimensions, size=self.nnz, replace=False)
+        values = rng.uniform(size=self.nnz)
+        order = np.argsort(indices, kind="stable")
+        return indices[order].astype(np.int32), values[order]
+
+    def _fast(self, digest):
+        # Philox is keyed with 128 bits of the digest; Generator.choice samples
+        # without replacement in O(nnz) when nnz is small next to dimensions
+        rng = np.random.Generator(np.random.Philox(key=int.from_bytes(digest[:16], "little")))
+        indices = np.sort(rng.choice(self.dimensions, size=self.nnz, replace=False, shuffle=False))
+        values = rng.random(self.nnz)
+        return indices.astype(SparseVector.index_dtype_for(self.dimensions)), values
+
+# Self-execute section for testing
+if __name__ == "__main__":
+    import hashlib
+    from scipy.sparse import random as sparse_random
+    from scipy.sparse.linalg import norm
+
+    digest = hashlib.sha256(b"test").digest()
+    encoder = SparseEncoder(16384)
+    reference = sparse_random(
+        1, 16384, density=0.1, format='csr',
+        random_state=np.random.RandomState(int.from_bytes(digest, "big") % (2**32)),
+    )
+    reference = reference / norm(reference)
+    vector = encoder.encode(digest)
+    print("Compat matches scipy:", np.array_equal(vector.indices, reference.indices)
+          and np.array_equal(vector.values, reference.data))
+    print("Fast vector:", SparseEncoder(16384, mode="fast").encode(digest))
\ No newline at end of file
@@ -0,0 +1,568 @@
+import json
+import os
+import struct
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+# Index log record of the memmap store: a 32-byte key digest followed by a
+# little-endian int64 row offset, where -1 marks a deleted key
+INDEX_RECORD = struct.Struct("<32sq")
+
+# Rows allocated when a memmap file is created; it doubles whenever it fills
+INITIAL_MEMMAP_ROWS = 1024
+
+# Dead rows tolerated before a memmap file is considered for compaction
+MIN_DEAD_ROWS_TO_COMPACT = 1024
+
+# Rows of a SparseRowIndex are rebuilt once more than this fraction is dead
+SPARSE_INDEX_DEAD_RATIO = 0.5
+
+class SparseVector:
+    """
+    A hyperdimensional vector kept as parallel index/value arrays. Indices are
+    int16 whenever the dimensionality allows it, so a 10%-dense 16384-dim
+    float32 vector costs about 10 KB instead of 128 KB as a dense float64 array.
+    """
+    __slots__ = ("indices", "values", "dimensions")
+
+    def __init__(self, indices, values, dimensions):
+        self.indices = indices
+        self.values = values
+        self.dimensions = dimensions
+
+    @staticmethod
+    def index_dtype_for(dimensions):
+        """
+        Returns the smallest signed integer dtype that can address every dimension.
+        """
+        return np.int16 if dimensions <= np.iinfo(np.int16).max + 1 else np.int32
+
+    @classmethod
+    def from_dense(cls, vector, dtype=np.float32):
+        indices = np.flatnonzero(vector)
+        return cls(
+            indices.astype(cls.index_dtype_for(len(vector))),
+            vector[indices].astype(dtype),
+            len(vector),
+        )
+
+    def astype(self, dtype):
+        """
+        Returns a copy with compact indices and values of the given dtype.
+        """
+        return SparseVector(
+            self.indices.astype(self.index_dtype_for(self.dimensions)),
+            self.values.astype(dtype),
+            self.dimensions,
+        )
+
+    def toarray(self, dtype=None):
+        """
+        Materializes the vector as a dense 1-D array.
+        """
+        dense = np.zeros(self.dimensions, dtype=dtype or self.values.dtype)
+        dense[self.indices] = self.values
+        return dense
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.values.nbytes
+
+    def __len__(self):
+        return self.dimensions
+
+    def __repr__(self):
+        return f"SparseVector(nnz={len(self.indices)}, dimensions={self.dimensions}, dtype={self.values.dtype})"
+
+def serialize_vector(vector):
+    """
+    Packs a dense array or SparseVector into a compact binary blob. Dense
+    arrays that are mostly zero, such as every encoder output, are packed as
+    their nonzeros under the "packed" layout and come back dense.
+
+    Returns:
+        tuple: (blob, layout, dtype, shape) where dtype and shape are the text
+        metadata needed by deserialize_vector() to rebuild the vector.
+    """
+    if isinstance(vector, SparseVector):
+        return (
+            vector.indices.tobytes() + vector.values.tobytes(),
+            "sparse",
+            f"{vector.indices.dtype.str},{vector.values.dtype.str}",
+            f"{len(vector.indices)},{vector.dimensions}",
+        )
+    vector = np.ascontiguousarray(vector)
+    indices = np.flatnonzero(vector).astype(SparseVector.index_dtype_for(len(vector)))
+    if len(indices) * (indices.itemsize + vector.itemsize) < vector.nbytes:
+        return (
+            indices.tobytes() + vector[indices].tobytes(),
+            "packed",
+            f"{indices.dtype.str},{vector.dtype.str}",
+            f"{len(indices)},{len(vector)}",
+        )
+    return vector.tobytes(), "dense", vector.dtype.str, str(len(vector))
+
+def deserialize_vector(blob, layout, dtype, shape):
+    """
+    Rebuilds a vector packed by serialize_vector(). Apart from "packed" dense
+    vectors, the returned arrays are read-only views over the blob.
+    """
+    if layout in ("sparse", "packed"):
+        index_dtype, value_dtype = (np.dtype(part) for part in dtype.split(","))
+        nnz, dimensions = (int(part) for part in shape.split(","))
+        indices = np.frombuffer(blob, dtype=index_dtype, count=nnz)
+        values = np.frombuffer(blob, dtype=value_dtype, count=nnz, offset=nnz * index_dtype.itemsize)
+        if layout == "packed":
+            return SparseVector(indices, values, dimensions).toarray()
+        return SparseVector(indices, values, dimensions)
+    return np.frombuffer(blob, dtype=np.dtype(dtype), count=int(shape))
+
+class VectorStore:
+    """
+    An in-process store of hyperdimensional vectors addressed by slot number.
+    HolographicMemory keeps a compact digest -> slot index that points into it,
+    and released slots are recycled by later appends.
+    """
+    def __init__(self):
+        self._vectors = []
+        self._free_slots = []
+
+    def append(self, vector, key=None):
+        """
+        Stores a vector and returns the slot it was written to.
+        """
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+        else:
+            slot = len(self._vectors)
+            self._vectors.append(vector)
+        return slot
+
+    def get(self, slot):
+        return self._vectors[slot]
+
+    def set(self, slot, vector, key=None):
+        """
+        Overwrites the vector in a slot and returns the slot now holding it.
+        """
+        self._vectors[slot] = vector
+        return slot
+
+    def release(self, slot):
+        """
+        Drops the vector held in a slot and makes the slot reusable.
+        """
+        self._vectors[slot] = None
+        self._free_slots.append(slot)
+
+    def keys(self):
+        # An in-process store starts empty, so it has no persisted keys to report
+        return {}
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self):
+        return {}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        return len(self._vectors) - len(self._free_slots)
+
+class MemmapVectorStore:
+    """
+    An append-only store that keeps vectors in an np.memmap file, so memories
+    larger than RAM stay on disk and several processes on one host can map the
+    same pages read-only. A sidecar log maps key digests to row offsets and a
+    small JSON file records the row format. Overwritten and released rows are
+    left behind as dead rows until the file is compacted.
+    """
+    def __init__(self, base_path, dimensions, layout="dense", dtype=np.float64, nnz=None,
+                 read_only=False, compact_ratio=0.5):
+        self.vector_path = base_path + ".vec"
+        self.index_path = base_path + ".idx"
+        self.meta_path = base_path + ".json"
+        self.dimensions = dimensions
+        self.layout = layout
+        self.nnz = nnz
+        self.read_only = read_only
+        self.compact_ratio = compact_ratio
+
+        meta = {"dimensions": dimensions, "layout": layout, "dtype": np.dtype(dtype).str, "nnz": nnz}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as meta_file:
+                existing = json.load(meta_file)
+            if existing != meta:
+                raise ValueError(f"{self.vector_path} holds {existing}, not {meta}.")
+        elif read_only:
+            raise FileNotFoundError(f"No vector store at {self.vector_path}.")
+        else:
+            with open(self.meta_path, "w") as meta_file:
+                json.dump(meta, meta_file)
+            open(self.vector_path, "wb").close()
+            open(self.index_path, "wb").close()
+
+        if layout == "sparse":
+            self.record_dtype = np.dtype([
+                ("indices", SparseVector.index_dtype_for(dimensions), (nnz,)),
+                ("values", dtype, (nnz,)),
+            ])
+        else:
+            self.record_dtype = np.dtype((dtype, (dimensions,)))
+
+        self._index_file = None if read_only else open(self.index_path, "ab")
+        self._read_index()
+        self._map()
+
+    def _read_index(self):
+        self._keys = {}
+        self._row_keys = {}
+        self._rows = 0
+        self._dead_rows = 0
+        with open(self.index_path, "rb") as index_file:
+            data = index_file.read()
+            self._index_state = self._stat_index(index_file.fileno())
+        for key, row in INDEX_RECORD.iter_unpack(data[:len(data) - len(data) % INDEX_RECORD.size]):
+            previous = self._keys.pop(key, None)
+            if previous is not None:
+                del self._row_keys[previous]
+                self._dead_rows += 1
+            if row >= 0:
+                self._keys[key] = row
+                self._row_keys[row] = key
+                self._rows = max(self._rows, row + 1)
+
+    @staticmethod
+    def _stat_index(file_descriptor):
+        # The inode changes when compaction swaps the file in, the size on appends
+        status = os.fstat(file_descriptor)
+        return status.st_ino, status.st_size
+
+    def is_stale(self):
+        """
+        Returns whether the writer has appended or compacted since the index was read.
+        """
+        try:
+            status = os.stat(self.index_path)
+        except FileNotFoundError:
+            return False
+        return (status.st_ino, status.st_size) != self._index_state
+
+    def _map(self, minimum_rows=0):
+        size = os.path.getsize(self.vector_path)
+        capacity = size // self.record_dtype.itemsize
+        if not self.read_only and capacity < max(minimum_rows, 1):
+            # Grow the file geometrically; existing pages are left untouched
+            capacity = max(minimum_rows, 2 * capacity, INITIAL_MEMMAP_ROWS)
+            with open(self.vector_path, "r+b") as vector_file:
+                vector_file.truncate(capacity * self.record_dtype.itemsize)
+        self._capacity = capacity
+        if capacity == 0:
+            self._mmap = None
+            return
+        self._mmap = np.memmap(
+            self.vector_path,
+            dtype=self.record_dtype,
+            mode="r" if self.read_only else "r+",
+            shape=(capacity,),
+        )
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError(f"{self.vector_path} is mapped read-only.")
+
+    def append(self, vector, key=None):
+        """
+        Appends a vector as a new row and records it in the index under key.
+        """
+        self._check_writable()
+        if key is None:
+            raise ValueError("MemmapVectorStore needs a key for every vector.")
+        if self._rows >= self._capacity:
+            if self._mmap is not None:
+                self._mmap.flush()
+            self._map(self._rows + 1)
+        row = self._rows
+        if self.layout == "sparse":
+            vector = self.fit_record(vector)
+            self._mmap["indices"][row] = vector.indices
+            self._mmap["values"][row] = vector.values
+        else:
+            self._mmap[row] = vector.toarray() if isinstance(vector, SparseVector) else vector
+        self._rows += 1
+
+        previous = self._keys.get(key)
+        if previous is not None:
+            del self._row_keys[previous]
+            self._dead_rows += 1
+        self._keys[key] = row
+        self._row_keys[row] = key
+        self._index_file.write(INDEX_RECORD.pack(key, row))
+        return row
+
+    def fit_record(self, vector):
+        """
+        Returns vector as a SparseVector with exactly the nnz entries of a
+        sparse record, padding a sparser vector with explicit zeros. Raises
+        ValueError for a vector with more nonzeros than a record holds.
+        """
+        if not isinstance(vector, SparseVector):
+            vector = SparseVector.from_dense(np.asarray(vector), self.record_dtype["values"].base)
+        missing = self.nnz - len(vector.indices)
+        if missing < 0:
+            raise ValueError(
+                f"{self.vector_path} stores {self.nnz} nonzeros per vector; "
+                f"got a vector with {len(vector.indices)}."
+            )
+        if missing == 0:
+            return vector
+        padding = np.setdiff1d(np.arange(self.nnz), vector.indices)[:missing]
+        indices = np.concatenate([vector.indices, padding.astype(vector.indices.dtype)])
+        values = np.concatenate([vector.values, np.zeros(missing, dtype=vector.values.dtype)])
+        order = np.argsort(indices, kind="stable")
+        return SparseVector(indices[order], values[order], self.dimensions)
+
+    def get(self, slot):
+        if self.layout == "sparse":
+            return SparseVector(self._mmap["indices"][slot], self._mmap["values"][slot], self.dimensions)
+        return self._mmap[slot]
+
+    def set(self, slot, vector, key=None):
+        """
+        Writes the new vector to a fresh row, leaving the old row dead, and
+        returns the new row.
+        """
+        return self.append(vector, key if key is not None else self._row_keys[slot])
+
+    def release(self, slot):
+        """
+        Removes the key stored at a row; the row stays dead until compaction.
+        """
+        self._check_writable()
+        key = self._row_keys.pop(slot)
+        del self._keys[key]
+        self._dead_rows += 1
+        self._index_file.write(INDEX_RECORD.pack(key, -1))
+
+    def keys(self):
+        """
+        Returns the persisted key -> row index.
+        """
+        return dict(self._keys)
+
+    def needs_compaction(self):
+        return (
+            not self.read_only
+            and self._dead_rows >= MIN_DEAD_ROWS_TO_COMPACT
+            and self._dead_rows > self.compact_ratio * max(len(self._keys), 1)
+        )
+
+    def compact(self):
+        """
+        Rewrites the file with live rows only and swaps it in atomically.
+        Readers keep their old mapping until they call refresh().
+
+        Returns:
+            dict: Mapping of old row -> new row for every live key.
+        """
+        self._check_writable()
+        live_rows = sorted(self._row_keys)
+        mapping = {old_row: new_row for new_row, old_row in enumerate(live_rows)}
+        capacity = max(len(live_rows), INITIAL_MEMMAP_ROWS)
+        vector_tmp, index_tmp = self.vector_path + ".tmp", self.index_path + ".tmp"
+
+        with open(vector_tmp, "wb") as vector_file:
+            vector_file.truncate(capacity * self.record_dtype.itemsize)
+        compacted = np.memmap(vector_tmp, dtype=self.record_dtype, mode="r+", shape=(capacity,))
+        if live_rows:
+            compacted[:len(live_rows)] = self._mmap[np.array(live_rows)]
+        compacted.flush()
+        del compacted
+        with open(index_tmp, "wb") as index_file:
+            for old_row in live_rows:
+                index_file.write(INDEX_RECORD.pack(self._row_keys[old_row], mapping[old_row]))
+
+        self.flush()
+        self._index_file.close()
+        self._mmap = None
+        os.replace(vector_tmp, self.vector_path)
+        os.replace(index_tmp, self.index_path)
+        self._index_file = open(self.index_path, "ab")
+        self._read_index()
+        self._map()
+        return mapping
+
+    def refresh(self):
+        """
+        Re-reads the index and remaps the file, picking up rows appended or
+        compacted by the writer process.
+        """
+        self._read_index()
+        self._mmap = None
+        self._map()
+
+    def flush(self):
+        if self._mmap is not None and not self.read_only:
+            self._mmap.flush()
+        if self._index_file is not None:
+            self._index_file.flush()
+
+    def close(self):
+        self.flush()
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        self._mmap = None
+
+    def __len__(self):
+        return len(self._keys)
+
+class SparseRowIndex:
+    """
+    Sparse vectors kept as rows of CSR chunks, scored against a query with
+    one sparse matrix-vector product per chunk. New rows wait in a buffer
+    that becomes a chunk before the next product, and chunks of similar
+    size are merged, so n rows take O(log n) chunks. Each row is stored
+    under an id; replaced and removed rows are masked until the chunks are
+    rebuilt without them.
+    """
+    def __init__(self, dimensions, dtype=np.float32):
+        self.dimensions = dimensions
+        self.dtype = np.dtype(dtype)
+        self.clear()
+
+    def clear(self):
+        self._chunks = []
+        self._pending_indices = []
+        self._pending_values = []
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._valid = np.zeros(0, dtype=bool)
+        self._rows = 0
+        self._dead_rows = 0
+        self._row_of = {}
+
+    def add(self, row_id, vector):
+        """
+        Stores vector (a SparseVector or dense array) under row_id, replacing
+        the row previously stored under it.
+        """
+        self.remove(row_id)
+        if not isinstance(vector, SparseVector):
+            vector = SparseVector.from_dense(vector, self.dtype)
+        if self._rows >= len(self._ids):
+            capacity = max(2 * len(self._ids), INITIAL_MEMMAP_ROWS)
+            self._ids = np.concatenate([self._ids, np.zeros(capacity - len(self._ids), dtype=np.int64)])
+            self._valid = np.concatenate([self._valid, np.zeros(capacity - len(self._valid), dtype=bool)])
+        self._pending_indices.append(vector.indices.astype(np.int32))
+        self._pending_values.append(vector.values.astype(self.dtype, copy=False))
+        self._ids[self._rows] = row_id
+        self._valid[self._rows] = True
+        self._row_of[row_id] = self._rows
+        self._rows += 1
+
+    def get(self, row_id):
+        """
+        Returns the row stored under row_id as a SparseVector, or None.
+        """
+        row = self._row_of.get(row_id)
+        if row is None:
+            return None
+        index_dtype = SparseVector.index_dtype_for(self.dimensions)
+        for chunk in self._chunks:
+            if row < chunk.shape[0]:
+                start, stop = chunk.indptr[row], chunk.indptr[row + 1]
+                return SparseVector(chunk.indices[start:stop].astype(index_dtype), chunk.data[start:stop].copy(), self.dimensions)
+            row -= chunk.shape[0]
+        return SparseVector(self._pending_indices[row].astype(index_dtype), self._pending_values[row].copy(), self.dimensions)
+
+    def remove(self, row_id):
+        row = self._row_of.pop(row_id, None)
+        if row is not None:
+            self._valid[row] = False
+            self._dead_rows += 1
+
+    def scores(self, query):
+        """
+        Returns the ids of the live rows and their dot products with a dense query.
+        """
+        self._seal()
+        if self._dead_rows > SPARSE_INDEX_DEAD_RATIO * max(self._rows, 1):
+            self._rebuild()
+        if not self._chunks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=self.dtype)
+        scores = np.concatenate([chunk @ query for chunk in self._chunks])
+        valid = self._valid[:self._rows]
+        return self._ids[:self._rows][valid], scores[valid]
+
+    def _seal(self):
+        if not self._pending_indices:
+            return
+        lengths = [len(indices) for indices in self._pending_indices]
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        chunk = csr_matrix(
+            (np.concatenate(self._pending_values), np.concatenate(self._pending_indices), indptr),
+            shape=(len(lengths), self.dimensions),
+        )
+        self._pending_indices, self._pending_values = [], []
+        self._chunks.append(chunk)
+        # Merging neighbours of similar size keeps the copying amortized O(nnz log n)
+        while len(self._chunks) > 1 and self._chunks[-2].shape[0] <= 2 * self._chunks[-1].shape[0]:
+            last = self._chunks.pop()
+            self._chunks[-1] = vstack([self._chunks[-1], last], format="csr")
+
+    def _rebuild(self):
+        valid = self._valid[:self._rows]
+        matrix = vstack(self._chunks, format="csr")[np.flatnonzero(valid)] if self._chunks else None
+        ids = self._ids[:self._rows][valid]
+        self.clear()
+        if matrix is not None and matrix.shape[0]:
+            self._chunks = [matrix]
+            self._rows = len(ids)
+            self._ids = ids.copy()
+            self._valid = np.ones(self._rows, dtype=bool)
+            self._row_of = {int(row_id): row for row, row_id in enumerate(ids)}
+
+    @property
+    def nbytes(self):
+        stored = sum(chunk.data.nbytes + chunk.indices.nbytes + chunk.indptr.nbytes for chunk in self._chunks)
+        pending = sum(indices.nbytes + values.nbytes for indices, values in zip(self._pending_indices, self._pending_values))
+        return stored + pending + self._ids.nbytes + self._valid.nbytes
+
+    def __len__(self):
+        return len(self._row_of)
+
+# Self-execute section for testing
+if __name__ == "__main__":
+    store = VectorStore()
+    first = store.append([1.0, 0.0])
+    second = store.append([0.0, 1.0])
+    store.release(first)
+    print("Reused slot:", store.append([0.5, 0.5]) == first)
+    print("Stored vectors:", len(store), store.get(second))
+
+    # Round-trip a sparse vector through its binary form
+    sparse = SparseVector.from_dense(np.array([0.0, 0.6, 0.0, 0.8]))
+    restored = deserialize_vector(*serialize_vector(sparse))
+    print("Round-tripped:", restored, restored.toarray())
+    dense = np.zeros(1000)
+    dense[::10] = 1.0
+    blob, layout, _, _ = serialize_vector(dense)
+    print(f"Packed dense vector: {layout}, {len(blob)} of {dense.nbytes} bytes")
+
+    # Test the memmap store with an overwrite and a read-only reader
+    import tempfile
+    base_path = os.path.join(tempfile.mkdtemp(), "vectors")
+    writer = MemmapVectorStore(base_path, dimensions=4)
+    row = writer.append(np.array([1.0, 0.0, 0.0, 0.0]), key=b"a" * 32)
+    row = writer.set(row, np.array([0.0, 1.0, 0.0, 0.0]))
+    writer.flush()
+    reader = MemmapVectorStore(base_path, dimensions=4, read_only=True)
+    print("Reader sees:", reader.get(reader.keys()[b"a" * 32]))
+    print("Compaction mapping:", writer.compact())
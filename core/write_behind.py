@@ -0,0 +1,180 @@
+import atexit
+import sqlite3
+import threading
+import time
+
+# Durability levels mapped to SQLite's synchronous setting. In WAL mode
+# "normal" only fsyncs at checkpoints, so a power loss can drop the last
+# committed batches but never corrupts the database.
+DURABILITY_LEVELS = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+
+# Seconds the flush thread waits before retrying a batch whose write failed
+FLUSH_RETRY_SECONDS = 0.5
+
+class WriteBehindWriter:
+    """
+    Queues rows for one SQLite INSERT statement and writes them in batched
+    transactions over a single long-lived WAL connection. A batch is flushed
+    when flush_rows rows have accumulated or flush_interval_ms has passed,
+    on an explicit flush(), and on close() or interpreter exit. Rows of a
+    failed write are queued again; an error on the flush thread is raised by
+    the next submit() and retried by the next flush().
+    """
+    def __init__(self, db_path, insert_sql, flush_rows=256, flush_interval_ms=50,
+                 durability="normal", max_queue_rows=None):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unsupported durability level: {durability}")
+        self.db_path = db_path
+        self.insert_sql = insert_sql
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval_ms / 1000
+        self.durability = durability
+        # Past this depth submit() flushes in the caller's thread, which
+        # applies backpressure instead of letting the queue grow without bound
+        self.max_queue_rows = max_queue_rows or 64 * self.flush_rows
+
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={DURABILITY_LEVELS[durability]}")
+
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._queue_lock)
+        self._closed = False
+        self._error = None
+        self.metrics = {
+            "rows_submitted": 0,
+            "rows_flushed": 0,
+            "flushes": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "failed_flushes": 0,
+        }
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, rows):
+        """
+        Queues rows for writing and returns without waiting for SQLite. Raises
+        the error of a failed background write once, without queuing the rows.
+        """
+        with self._queue_lock:
+            if self._closed:
+                raise ValueError(f"Writer for {self.db_path} is closed.")
+            error, self._error = self._error, None
+            if error is not None:
+                raise error
+            self._queue.extend(rows)
+            self.metrics["rows_submitted"] += len(rows)
+            depth = len(self._queue)
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], depth)
+            # Wake the flush thread when a batch starts (to time it) or fills up
+            if depth == len(rows) or depth >= self.flush_rows:
+                self._wakeup.notify()
+        if depth >= self.max_queue_rows:
+            self.flush()
+
+    def _run(self):
+        while True:
+            with self._queue_lock:
+                while not self._queue and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                if len(self._queue) < self.flush_rows:
+                    self._wakeup.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep running; the rows are queued again for the next attempt
+                with self._queue_lock:
+                    self._error = e
+                    if not self._closed:
+                        self._wakeup.wait(FLUSH_RETRY_SECONDS)
+
+    def flush(self):
+        """
+        Writes every queued row in one transaction. If the write fails, the
+        rows are put back at the front of the queue and the error is raised.
+        """
+        with self._conn_lock:
+            with self._queue_lock:
+                rows, self._queue = self._queue, []
+            if not rows:
+                return
+            start = time.perf_counter()
+            try:
+                cursor = self._conn.cursor()
+                cursor.executemany(self.insert_sql, rows)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                with self._queue_lock:
+                    self._queue[:0] = rows
+                    self.metrics["failed_flushes"] += 1
+                raise
+            with self._queue_lock:
+                # Written rows supersede an earlier background failure
+                self._error = None
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            self.metrics["rows_flushed"] += len(rows)
+            self.metrics["flushes"] += 1
+            self.metrics["last_flush_ms"] = elapsed_ms
+            self.metrics["max_flush_ms"] = max(self.metrics["max_flush_ms"], elapsed_ms)
+            self.metrics["total_flush_ms"] += elapsed_ms
+
+    def close(self):
+        """
+        Flushes pending rows, stops the flush thread and closes the connection.
+        """
+        with self._queue_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            with self._conn_lock:
+                self._conn.close()
+            atexit.unregister(self.close)
+
+    def get_metrics(self):
+        """
+        Returns the queue depth and flush latency metrics.
+        """
+        with self._queue_lock:
+            metrics = dict(self.metrics)
+            metrics["queue_depth"] = len(self._queue)
+        flushes = metrics["flushes"]
+        metrics["avg_flush_ms"] = metrics["total_flush_ms"] / flushes if flushes else 0.0
+        return metrics
+
+# Self-execute section for testing
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    db_path = os.path.join(tempfile.mkdtemp(), "write_behind.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE entries (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT)")
+    conn.close()
+
+    writer = WriteBehindWriter(db_path, "INSERT INTO entries (content) VALUES (?)", flush_rows=100)
+    for i in range(1000):
+        writer.submit([(f"row {i}",)])
+    writer.close()
+
+    conn = sqlite3.connect(db_path)
+    print("Rows written:", conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+    conn.close()
+    print("Writer metrics:", writer.get_metrics())
@@ -82,9 +82,23 @@ DATABASES = {
             entity_id TEXT NOT NULL,
             memory_type TEXT NOT NULL,
             content TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            input_key BLOB,
+            vector BLOB,
+            vector_layout TEXT,
+            vector_dtype TEXT,
+            vector_shape TEXT,
+            seen_count INTEGER DEFAULT 1,
+            last_seen DATETIME,
+            revision INTEGER
         );
 
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_memory_entries_entry
+        ON memory_entries (entity_id, input_key);
+
+        CREATE INDEX IF NOT EXISTS idx_memory_entries_revision
+        ON memory_entries (revision);
+
         CREATE TABLE IF NOT EXISTS associations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             entity_id TEXT NOT NULL,
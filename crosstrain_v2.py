@@ -8,14 +8,14 @@ from domains.python_module import EmergentPythonEntity
 from domains.science_module import EmergentScienceEntity
 
 def cross_train():
-    # Initialize Holographic Memory
-    memory = HolographicMemory()
+    # Initialize Holographic Memory, shared by the entities of this run
+    memory = HolographicMemory(entity_id="crosstrain_v2")
 
-    # Initialize Database Managers for each domain
-    math_db = DBManager("math.db")
-    english_db = DBManager("english.db")
-    python_db = DBManager("python.db")
-    science_db = DBManager("science.db")
+    # Initialize Database Managers for each domain; rows are committed in batches
+    math_db = DBManager("math.db", batch_rows=256)
+    english_db = DBManager("english.db", batch_rows=256)
+    python_db = DBManager("python.db", batch_rows=256)
+    science_db = DBManager("science.db", batch_rows=256)
 
     # Create domain modules and entities
     math_module = EmergentMathEntity()
@@ -62,9 +62,11 @@ def cross_train():
     }
 
     # Distribute cross-training tasks and have each entity learn from one another
-    for domain, tasks in cross_train_task.items():
-        for task in tasks:
-            meta_entity.distribute_tasks({domain: task})
+    meta_entity.distribute_task_batches(cross_train_task)
+
+    # Commit the remaining rows and report how many were stored
+    for db in (math_db, english_db, python_db, science_db):
+        db.close()
 
     print("Cross-training completed. Entities have shared knowledge.")
 
@@ -45,10 +45,11 @@ class EmergentPythonEntity:
                 sys.stdout = new_stdout
 
                 # Evaluate the provided code
-                evaluation_result = eval(task_input["code"])
-
-                # Restore stdout and get captured output
-                sys.stdout = old_stdout
+                try:
+                    evaluation_result = eval(task_input["code"])
+                finally:
+                    # Restore stdout even when the evaluation fails
+                    sys.stdout = old_stdout
                 captured_output = new_stdout.getvalue().strip()
 
                 # Determine the emergent response
@@ -12,8 +12,8 @@ from core.learning_engine import LearningEngine
 from core.entanglement_hub import EntanglementHub
 
 def main():
-    # Initialize Holographic Memory
-    memory = HolographicMemory()
+    # Initialize Holographic Memory, shared by the entities of this run
+    memory = HolographicMemory(entity_id="main")
 
     # Initialize Database Managers for each domain
     math_db = DBManager("math.db")
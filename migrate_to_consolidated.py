@@ -0,0 +1,109 @@
+import argparse
+import os
+from core.db_manager import DBManager, KnowledgeStore
+
+# Per-domain databases written by DBManager before consolidation
+DOMAIN_DATABASES = {
+    "math": "math.db",
+    "english": "english.db",
+    "python": "python.db",
+    "science": "science.db",
+}
+
+# Rows copied per transaction
+MIGRATION_BATCH_SIZE = 5000
+
+def record_table(conn):
+    # Remembers the last copied row of each source, so an interrupted or
+    # repeated migration resumes instead of duplicating rows
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS migrations (
+        source TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL
+    )
+    """)
+    conn.commit()
+
+def migrate_knowledge(store, domain, db_name):
+    """
+    Copies the knowledge rows of one per-domain database into its shard,
+    keeping their timestamps and tagging them with the domain.
+    """
+    source = DBManager(db_name)  # Brings old files up to the current knowledge schema
+    shard = store.shard_for(domain)
+    conn = shard.get_connection()
+    record_table(conn)
+    row = conn.execute("SELECT last_id FROM migrations WHERE source = ?", (db_name,)).fetchone()
+    last_id = row[0] if row else 0
+    copied = 0
+    while True:
+        rows = source.get_connection().execute(
+            """
+            SELECT id, input_data, output_data, timestamp, content_hash, seen_count, last_seen FROM knowledge
+            WHERE id > ? ORDER BY id LIMIT ?
+            """,
+            (last_id, MIGRATION_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO knowledge (input_data, output_data, timestamp, content_hash, seen_count, last_seen, domain)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (IFNULL(domain, ''), content_hash) DO UPDATE SET
+                    output_data = excluded.output_data,
+                    seen_count = seen_count + excluded.seen_count,
+                    last_seen = excluded.last_seen
+                """,
+                [row[1:] + (domain,) for row in rows],
+            )
+            conn.execute("INSERT OR REPLACE INTO migrations (source, last_id) VALUES (?, ?)", (db_name, last_id))
+        copied += len(rows)
+    source.close()
+    return copied
+
+def migrate_memory(store, memory_db_name="memory.db"):
+    """
+    Copies memory_entries from memory.db into the first shard, so a
+    HolographicMemory(db_path=...) can share the consolidated file.
+    """
+    data_directory = os.path.dirname(store.shards[0].db_path)
+    memory_path = os.path.join(data_directory, memory_db_name)
+    conn = store.shards[0].get_connection()
+    conn.execute("ATTACH DATABASE ? AS source", (memory_path,))
+    try:
+        schema = conn.execute(
+            "SELECT sql FROM source.sqlite_master WHERE type = 'table' AND name = 'memory_entries'"
+        ).fetchone()
+        if schema is None:
+            return 0
+        conn.execute(schema[0].replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+        with conn:
+            # Ids are kept, so entries already copied by an earlier run are
+            # skipped. The first HolographicMemory to open the file merges
+            # duplicate keys and builds the indexes.
+            cursor = conn.execute("INSERT OR IGNORE INTO memory_entries SELECT * FROM source.memory_entries")
+        return cursor.rowcount
+    finally:
+        conn.execute("DETACH DATABASE source")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move the per-domain databases into a consolidated knowledge store.")
+    parser.add_argument("--shards", type=int, default=1, help="Number of shard files to spread the domains over.")
+    parser.add_argument("--base-name", default="knowledge", help="File name prefix of the consolidated store.")
+    parser.add_argument("--memory", action="store_true", help="Also copy memory_entries from memory.db into the first shard.")
+    args = parser.parse_args()
+
+    with KnowledgeStore(shards=args.shards, base_name=args.base_name) as store:
+        data_directory = os.path.dirname(store.shards[0].db_path)
+        for domain, db_name in DOMAIN_DATABASES.items():
+            if not os.path.exists(os.path.join(data_directory, db_name)):
+                print(f"Skipping {db_name}: not found.")
+                continue
+            copied = migrate_knowledge(store, domain, db_name)
+            print(f"Migrated {copied} rows from {db_name} into {store.shard_for(domain).db_name}.")
+        if args.memory:
+            print(f"Migrated {migrate_memory(store)} memory entries into {store.shards[0].db_name}.")
+        print("Rows per domain:", store.count_by_domain())
\ No newline at end of file
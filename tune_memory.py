@@ -0,0 +1,198 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import numpy as np
+from core.holographic_memory import HolographicMemory
+from domains.math_module import EmergentMathEntity
+from domains.english_module import EmergentEnglishEntity
+from domains.python_module import EmergentPythonEntity
+from domains.science_module import EmergentScienceEntity
+
+# Settings swept by default
+SWEEP_DIMENSIONS = (1024, 2048, 4096, 8192, 16384)
+SWEEP_DENSITIES = (0.01, 0.05, 0.1)
+
+# Similarity recall a configuration must reach to be recommended
+TARGET_SIMILARITY_RECALL = 0.99
+
+# Norm of the Gaussian noise added to unit-length queries for similarity
+# recall; at 8.0 a correct match scores only about 0.12
+QUERY_NOISE = 8.0
+
+# Queries sampled per setting to measure similarity recall
+SIMILARITY_QUERIES = 200
+
+# HolographicMemory arguments shared by every measured setting; the
+# recommendation prints them along with the swept dimensions and density
+MEASURED_SETTINGS = {
+    "layout": "sparse",
+    "dtype": "float32",
+    "similarity_index": True,
+    "encoder": "fast",
+}
+
+def synthetic_corpus(size, seed=0):
+    """
+    Builds (task, result) pairs by running generated tasks through the domain modules.
+    """
+    rng = random.Random(seed)
+    modules = {
+        "math": EmergentMathEntity(),
+        "english": EmergentEnglishEntity(),
+        "python": EmergentPythonEntity(),
+        "science": EmergentScienceEntity(),
+    }
+    corpus = []
+    for i in range(size):
+        domain = ("math", "english", "python", "science")[i % 4]
+        if domain == "math":
+            task = {"type": rng.choice(["addition", "subtraction", "multiplication", "division"]),
+                    "a": rng.randint(0, 1000), "b": rng.randint(1, 1000)}
+        elif domain == "english":
+            task = {"type": "vocabulary", "word": f"word{i}", "definition": f"definition of word {i}"}
+        elif domain == "python":
+            task = {"type": "evaluate", "code": f"{rng.randint(0, 1000)} * {rng.randint(0, 1000)}"}
+        else:
+            task = {"type": rng.choice(["biology", "chemistry", "physics", "astronomy"]),
+                    "question": f"Question {i}?", "answer": f"Answer {i}."}
+        corpus.append((task, {"result": modules[domain].interact(task)}))
+    return corpus
+
+def recorded_corpus(db_names, size):
+    """
+    Reads up to size (task, result) pairs recorded in the knowledge tables of the domain databases.
+    """
+    data_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    corpus = []
+    for db_name in db_names:
+        conn = sqlite3.connect(os.path.join(data_directory, db_name))
+        try:
+            rows = conn.execute("SELECT input_data, output_data FROM knowledge LIMIT ?", (size,)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        conn.close()
+        corpus.extend(({"task": task}, {"result": result}) for task, result in rows)
+    return corpus[:size]
+
+def measure_setting(corpus, dimensions, density, noise=QUERY_NOISE, seed=0):
+    """
+    Encodes the corpus with one setting and returns its encode time, bytes
+    per entry, input collisions and similarity recall@1.
+    """
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        memory = HolographicMemory(
+            dimensions=dimensions,
+            density=density,
+            warm_start=None,
+            db_path=os.path.join(directory, "memory.db"),
+            **MEASURED_SETTINGS,
+        )
+        start = time.perf_counter()
+        memory.encode_many(corpus)
+        encode_us = (time.perf_counter() - start) / len(corpus) * 1e6
+        usage = memory.memory_usage()
+        collisions = count_collisions(memory, corpus)
+
+        # Look up noisy copies of stored inputs; a hit is the right entry at rank one
+        sample = rng.choice(len(corpus), size=min(SIMILARITY_QUERIES, len(corpus)), replace=False)
+        hits = 0
+        for i in sample:
+            task = corpus[i][0]
+            noisy = memory._dense(memory._to_hyperdimensional(task))
+            noisy = noisy + rng.normal(0, noise / np.sqrt(dimensions), dimensions)
+            results = memory.retrieve_similar(noisy, k=1)
+            hits += bool(results) and results[0][0] == memory._key(task)
+        memory.close()
+
+    # Similarity rows are sparse, about nnz * 8 bytes each, so the measured
+    # total scales with the number of entries
+    entries = max(usage["entries"], 1)
+    return {
+        "dimensions": dimensions,
+        "density": density,
+        "encode_us": encode_us,
+        "bytes_per_entry": usage["total_bytes"] / entries,
+        "collisions": collisions,
+        "similarity_recall": hits / len(sample),
+    }
+
+def count_collisions(memory, corpus):
+    """
+    Returns how many distinct tasks share an input vector with another task,
+    either through the same digest or through the same encoded nonzeros.
+    Colliding tasks overwrite each other's entries.
+    """
+    tasks = {}
+    for task, _ in corpus:
+        tasks.setdefault(repr(task), task)
+    vectors = memory._encode_digests([memory._key(task) for task in tasks.values()])
+    distinct = {vector.indices.tobytes() + vector.values.tobytes() for vector in vectors}
+    return len(tasks) - len(distinct)
+
+def sweep(corpus, dimensions_list=SWEEP_DIMENSIONS, densities=SWEEP_DENSITIES, noise=QUERY_NOISE):
+    results = []
+    print(f"{'dimensions':>10} {'density':>8} {'encode (us)':>12} {'bytes/entry':>12} {'collisions':>10} {'similar@1':>9}")
+    for dimensions in dimensions_list:
+        for density in densities:
+            result = measure_setting(corpus, dimensions, density, noise=noise)
+            results.append(result)
+            print(f"{dimensions:>10} {density:>8} {result['encode_us']:>12.1f} "
+                  f"{result['bytes_per_entry']:>12.0f} {result['collisions']:>10} "
+                  f"{result['similarity_recall']:>9.3f}")
+    return results
+
+def recommend(results, entries, ram_bytes, target_recall=TARGET_SIMILARITY_RECALL):
+    """
+    Returns the cheapest setting that reaches the target recall and fits
+    entries in ram_bytes, or the best-recall setting that fits when none does.
+    Returns None when nothing fits.
+    """
+    fitting = [result for result in results if result["bytes_per_entry"] * entries <= ram_bytes]
+    if not fitting:
+        return None
+    good = [result for result in fitting if result["collisions"] == 0 and result["similarity_recall"] >= target_recall]
+    if good:
+        return min(good, key=lambda result: (result["bytes_per_entry"], result["encode_us"]))
+    return max(fitting, key=lambda result: (result["similarity_recall"], -result["bytes_per_entry"]))
+
+def constructor(result):
+    """
+    Returns the HolographicMemory call that was measured for a setting.
+    """
+    settings = {"dimensions": result["dimensions"], "density": result["density"], **MEASURED_SETTINGS}
+    arguments = ", ".join(
+        f'{name}="{value}"' if isinstance(value, str) else f"{name}={value}"
+        for name, value in settings.items()
+    )
+    return f"HolographicMemory({arguments})"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep HolographicMemory dimensions and density and recommend a setting.")
+    parser.add_argument("--entries", type=int, default=100000, help="Entries the deployment must hold.")
+    parser.add_argument("--ram-mb", type=float, default=1024, help="RAM budget for the memory in MB.")
+    parser.add_argument("--corpus-size", type=int, default=2000, help="Pairs encoded per setting.")
+    parser.add_argument("--noise", type=float, default=QUERY_NOISE, help="Norm of the query noise for similarity recall.")
+    parser.add_argument("--recorded", nargs="*", metavar="DB",
+                        help="Use knowledge rows from these data/ databases instead of a synthetic corpus.")
+    args = parser.parse_args()
+
+    if args.recorded:
+        corpus = recorded_corpus(args.recorded, args.corpus_size)
+    else:
+        corpus = synthetic_corpus(args.corpus_size)
+    if not corpus:
+        raise SystemExit("Error: The corpus is empty.")
+
+    results = sweep(corpus, noise=args.noise)
+    best = recommend(results, args.entries, args.ram_mb * 1024 * 1024)
+    if best is None:
+        print(f"No setting fits {args.entries} entries in {args.ram_mb} MB.")
+    else:
+        total_mb = best["bytes_per_entry"] * args.entries / (1024 * 1024)
+        print(f"Recommended for {args.entries} entries in {args.ram_mb} MB: "
+              f"{constructor(best)} - about {total_mb:.0f} MB, "
+              f"similarity recall {best['similarity_recall']:.3f}")
\ No newline at end of file